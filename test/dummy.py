@@ -0,0 +1,99 @@
+import threading
+import time
+
+from tsmppt60_driver.base import ModbusRegisterTable
+
+
+"""Dummy TS-MPPT-60 shared by the test cases."""
+
+
+class DummyRequest:
+    """Dummy request class against requests.Reguest."""
+
+    def __init__(self, _url):
+        self.url = _url
+
+
+class DummyResponse:
+    """Dummy response class against requests.Response."""
+
+    def __init__(self, _url, _text):
+        self.request = DummyRequest(_url)
+        self.text = _text
+
+
+class DummyController:
+    """Dummy TS-MPPT-60 to answer MBCSV.cgi requests."""
+
+    RESPONSES = {
+        ModbusRegisterTable.VOLTAGE_SCALING: "1,4,4,0,180,0,0",
+        ModbusRegisterTable.CURRENT_SCALING: "1,4,4,0,80,0,0",
+        ModbusRegisterTable.BATTERY_VOLTAGE: "1,4,2,17,160",  # 24.79
+        ModbusRegisterTable.CHARGING_CURRENT: "1,4,2,255,168",  # -0.21
+        ModbusRegisterTable.TARGET_REGULATION_VOLTAGE: "1,4,2,0,0",  # 0.0
+        ModbusRegisterTable.OUTPUT_POWER: "1,4,2,0,0",  # 0.0
+        ModbusRegisterTable.ARRAY_VOLTAGE: "1,4,2,0,84",  # 0.46
+        ModbusRegisterTable.ARRAY_CURRENT: "1,4,2,0,0",  # 0.0
+        ModbusRegisterTable.VMP_LAST_SWEEP: "1,4,2,11,208",  # 16.61
+        ModbusRegisterTable.VOC_LAST_SWEEP: "1,4,2,15,193",  # 22.15
+        ModbusRegisterTable.POWER_LAST_SWEEP: "1,4,2,0,23",  # 2.53
+        ModbusRegisterTable.HEATSINK_TEMP: "1,4,2,0,7",  # 7
+        ModbusRegisterTable.BATTERY_TEMP: "1,4,2,0,25",  # 25
+        ModbusRegisterTable.AH_CHARGE_RESETABLE: "1,4,4,0,2,231,134",  # 19034.2
+        ModbusRegisterTable.KWH_CHARGE_RESETABLE: "1,4,2,1,4",  # 260
+        ModbusRegisterTable.LED_STATE: "1,4,2,0,11",  # 11
+        ModbusRegisterTable.CHARGE_STATE: "1,4,2,0,3",  # 3
+    }
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.errors = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._table = {
+            "AHI={}&ALO={}&RHI={}&RLO={}".format(p[0] >> 8, p[0] & 255, p[3] >> 8, p[3] & 255): text
+            for p, text in self.RESPONSES.items()
+        }
+
+    def get(self, url, timeout):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(self.delay)
+
+        with self._lock:
+            self.in_flight -= 1
+
+        query = str(url).split("?")[-1].split("&", 2)[-1]
+        if query in self.errors:
+            raise self.errors[query]
+        return DummyResponse(url, self._table[query])
+
+    def fail(self, param, error):
+        """Raise the error against the request of the param, or stop raising if error is None."""
+        query = "AHI={}&ALO={}&RHI={}&RLO={}".format(param[0] >> 8, param[0] & 255, param[3] >> 8, param[3] & 255)
+        if error is None:
+            self.errors.pop(query, None)
+        else:
+            self.errors[query] = error
+
+
+EXPECTED = {
+    "Battery Voltage": {"group": "Battery", "unit": "V", "value": 24.79},
+    "Target Voltage": {"group": "Battery", "unit": "V", "value": 0.0},
+    "Charge Current": {"group": "Battery", "unit": "A", "value": -0.21},
+    "Output Power": {"group": "Battery", "unit": "W", "value": 0.0},
+    "Array Voltage": {"group": "Array", "unit": "V", "value": 0.46},
+    "Array Current": {"group": "Array", "unit": "A", "value": 0.0},
+    "Sweep Vmp": {"group": "Array", "unit": "V", "value": 16.61},
+    "Sweep Voc": {"group": "Array", "unit": "V", "value": 22.15},
+    "Sweep Pmax": {"group": "Array", "unit": "W", "value": 2.53},
+    "Heat Sink Temperature": {"group": "Temperature", "unit": "C", "value": 7},
+    "Battery Temperature": {"group": "Temperature", "unit": "C", "value": 25},
+    "Amp Hours": {"group": "Counter", "unit": "Ah", "value": 19034.2},
+    "Kilowatt Hours": {"group": "Counter", "unit": "kWh", "value": 260},
+    "LED State": {"group": "Condition", "unit": "Numbers", "value": 11},
+    "Charge State": {"group": "Condition", "unit": "Numbers", "value": 3},
+}
@@ -0,0 +1,157 @@
+import unittest
+from unittest.mock import patch
+
+from tsmppt60_driver.aggregate import Aggregator, SlidingWindow, TumblingWindow
+from tsmppt60_driver.result import Layout, Snapshot
+
+
+def _status(voltage, charge_state):
+    return {
+        "Battery Voltage": {"group": "Battery", "unit": "V", "value": voltage},
+        "Charge State": {"group": "Condition", "unit": "Numbers", "value": charge_state},
+    }
+
+
+def _by_label(records):
+    return {(r["window"], r["end"], r["label"]): r for r in records}
+
+
+class TestTumblingWindow(unittest.TestCase):
+    """Test case for TumblingWindow."""
+
+    def test_close_window(self):
+        window = TumblingWindow(60)
+
+        self.assertEqual([], window.update(0, _status(24.0, 3)))
+        self.assertEqual([], window.update(30, _status(26.0, 5)))
+        self.assertEqual([], window.update(59, _status(25.0, 5)))
+        records = _by_label(window.update(60, _status(27.0, 3)))
+
+        self.assertEqual(
+            {
+                "window": "tumbling_60",
+                "start": 0,
+                "end": 60,
+                "label": "Battery Voltage",
+                "group": "Battery",
+                "unit": "V",
+                "count": 3,
+                "min": 24.0,
+                "max": 26.0,
+                "mean": 25.0,
+                "last": 25.0,
+            },
+            records[("tumbling_60", 60, "Battery Voltage")],
+        )
+        self.assertEqual(
+            {
+                "window": "tumbling_60",
+                "start": 0,
+                "end": 60,
+                "label": "Charge State",
+                "group": "Condition",
+                "unit": "Numbers",
+                "count": 3,
+                "mode": 5,
+                "last": 5,
+            },
+            records[("tumbling_60", 60, "Charge State")],
+        )
+
+        records = _by_label(window.flush())
+        self.assertEqual(27.0, records[("tumbling_60", 120, "Battery Voltage")]["mean"])
+        self.assertEqual([], window.flush())
+
+    def test_mode_tie_takes_last(self):
+        window = TumblingWindow(60)
+
+        window.update(0, _status(24.0, 3))
+        window.update(1, _status(24.0, 5))
+        records = _by_label(window.flush())
+
+        self.assertEqual(5, records[("tumbling_60", 60, "Charge State")]["mode"])
+
+
+class TestSlidingWindow(unittest.TestCase):
+    """Test case for SlidingWindow."""
+
+    def test_sliding(self):
+        window = SlidingWindow(30, 10)
+        voltages = [26.0, 24.0, 25.0, 23.0, 27.0]
+        closed = []
+
+        for i, voltage in enumerate(voltages):
+            closed.extend(window.update(i * 10, _status(voltage, 3 if i < 3 else 5)))
+        closed.extend(window.update(50, _status(28.0, 5)))
+
+        records = _by_label(closed)
+
+        self.assertEqual([10, 20, 30, 40, 50], sorted(end for _, end, label in records if label == "Charge State"))
+
+        record = records[("sliding_30_10", 30, "Battery Voltage")]
+        self.assertEqual((0, 3), (record["start"], record["count"]))
+        self.assertEqual((24.0, 26.0, 25.0, 25.0), (record["min"], record["max"], record["mean"], record["last"]))
+
+        record = records[("sliding_30_10", 50, "Battery Voltage")]
+        self.assertEqual((20, 3), (record["start"], record["count"]))
+        self.assertEqual((23.0, 27.0, 25.0, 27.0), (record["min"], record["max"], record["mean"], record["last"]))
+
+        self.assertEqual(3, records[("sliding_30_10", 30, "Charge State")]["mode"])
+        self.assertEqual(5, records[("sliding_30_10", 50, "Charge State")]["mode"])
+
+    def test_skip_empty_windows(self):
+        window = SlidingWindow(30, 10)
+
+        window.update(0, _status(24.0, 3))
+        closed = window.update(10000, _status(25.0, 3))
+
+        self.assertEqual([10, 20, 30], sorted({r["end"] for r in closed}))
+
+    def test_skip_stale(self):
+        layout = Layout.of([("Battery Voltage", "Battery", "V"), ("Charge State", "Condition", "Numbers")])
+        window = TumblingWindow(60)
+        stale = {"Battery Voltage": {"age": 1.0, "error": "OSError('timeout')"}}
+
+        window.update(0, Snapshot(layout, [24.0, 3], 0.0))
+        window.update(1, Snapshot(layout, [24.0, 5], 1.0, stale))
+        status = _status(24.0, 5)
+        status["Battery Voltage"].update({"stale": True, "age": 2.0})
+        window.update(2, status)
+
+        closed = _by_label(window.flush())
+
+        self.assertEqual(1, closed[("tumbling_60", 60, "Battery Voltage")]["count"])
+        self.assertEqual(3, closed[("tumbling_60", 60, "Charge State")]["count"])
+
+
+class TestAggregator(unittest.TestCase):
+    """Test case for Aggregator."""
+
+    def test_snapshot(self):
+        layout = Layout.of([("Battery Voltage", "Battery", "V"), ("Charge State", "Condition", "Numbers")])
+        aggregator = Aggregator([TumblingWindow(60), TumblingWindow(3600), SlidingWindow(120, 60)])
+
+        aggregator.update(Snapshot(layout, [24.0, 3], 0.0))
+        closed = _by_label(aggregator.update(Snapshot(layout, [26.0, 3], 60.0)))
+
+        self.assertEqual({"tumbling_60", "sliding_120_60"}, {window for window, _, _ in closed})
+        self.assertEqual(24.0, closed[("tumbling_60", 60, "Battery Voltage")]["mean"])
+
+        closed = _by_label(aggregator.flush())
+
+        self.assertEqual(25.0, closed[("tumbling_3600", 3600, "Battery Voltage")]["mean"])
+        self.assertEqual(26.0, closed[("tumbling_60", 120, "Battery Voltage")]["mean"])
+
+    def test_dict_without_timestamp(self):
+        aggregator = Aggregator([TumblingWindow(3600)])
+
+        with patch("tsmppt60_driver.aggregate.time.time", return_value=7200.5):
+            self.assertEqual([], aggregator.update(_status(24.0, 3)))
+
+        closed = _by_label(aggregator.flush())
+
+        self.assertEqual(24.0, closed[("tumbling_3600", 10800, "Battery Voltage")]["last"])
+
+
+if __name__ == "__main__":
+    unittest.main()
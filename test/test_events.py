@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from dummy import DummyController
+
+from tsmppt60_driver import SystemStatus
+from tsmppt60_driver.base import ModbusRegisterTable
+from tsmppt60_driver.events import EventBus
+from tsmppt60_driver.result import Layout, Snapshot
+
+
+LAYOUT = Layout.of([("Battery Voltage", "Battery", "V"), ("Charge State", "Condition", "Numbers")])
+
+
+def _snapshot(voltage, charge_state, timestamp):
+    return Snapshot(LAYOUT, [voltage, charge_state], timestamp)
+
+
+class TestEventBus(unittest.TestCase):
+    """Test case for EventBus."""
+
+    def setUp(self):
+        self._events = EventBus()
+        self._received = []
+
+    def test_change(self):
+        self._events.on_change("Charge State", self._received.append)
+
+        self._events.evaluate(_snapshot(24.0, 3, 1.0))
+        self._events.evaluate(_snapshot(24.5, 3, 2.0))
+        self._events.evaluate(_snapshot(24.5, 5, 3.0))
+
+        self.assertEqual(
+            [{"type": "change", "label": "Charge State", "old": 3, "new": 5, "timestamp": 3.0}], self._received
+        )
+
+    def test_threshold_with_hysteresis(self):
+        self._events.on_threshold("Battery Voltage", self._received.append, above=28.0, below=24.0, hysteresis=0.5)
+
+        for i, voltage in enumerate([23.9, 23.8, 24.2, 23.9, 24.6, 23.7, 28.1, 28.2, 27.9, 28.3]):
+            self._events.evaluate(_snapshot(voltage, 3, float(i)))
+
+        self.assertEqual(
+            [("below", 23.9), ("below", 23.7), ("above", 28.1)], [(e["type"], e["new"]) for e in self._received]
+        )
+
+    def test_dict_and_unsubscribe(self):
+        subscription = self._events.on_change("Charge State", self._received.append)
+        status = _snapshot(24.0, 3, 1.0).to_dict()
+
+        self._events.evaluate(status, 1.0)
+        status["Charge State"]["value"] = 5
+        self.assertEqual(1, len(self._events.evaluate(status, 2.0)))
+
+        self._events.unsubscribe(subscription)
+        status["Charge State"]["value"] = 3
+        self.assertEqual([], self._events.evaluate(status, 3.0))
+
+    def test_subscribe_while_evaluating(self):
+        self._events.on_change("Charge State", self._received.append)
+        # Switch threads often, so subscribing happens in the middle of evaluating.
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+
+        def subscribe():
+            for i in range(2000):
+                subscription = self._events.on_change("Label {}".format(i), self._received.append)
+                if i % 2:
+                    self._events.unsubscribe(subscription)
+
+        thread = threading.Thread(target=subscribe)
+        thread.start()
+
+        evaluated = 0
+        while thread.is_alive() or evaluated < 100:
+            self._events.evaluate(_snapshot(24.0, evaluated % 2, float(evaluated)))
+            evaluated += 1
+        thread.join()
+
+        self.assertEqual(evaluated - 1, len(self._received))
+
+    def test_callback_error(self):
+        def _raise(event):
+            raise RuntimeError("callback error")
+
+        self._events.on_change("Charge State", _raise)
+        self._events.on_change("Charge State", self._received.append)
+
+        with self.assertLogs("EventBus", "ERROR"):
+            self._events.evaluate(_snapshot(24.0, 3, 1.0))
+            self._events.evaluate(_snapshot(24.0, 5, 2.0))
+
+        self.assertEqual(1, len(self._received))
+
+    def test_to_queue(self):
+        async def _main():
+            queue = asyncio.Queue()
+            self._events.on_change("Charge State", EventBus.to_queue(queue, asyncio.get_running_loop()))
+
+            def _poll():
+                self._events.evaluate(_snapshot(24.0, 3, 1.0))
+                self._events.evaluate(_snapshot(24.0, 5, 2.0))
+
+            thread = threading.Thread(target=_poll)
+            thread.start()
+            event = await asyncio.wait_for(queue.get(), 5)
+            thread.join()
+            return event
+
+        self.assertEqual(5, asyncio.run(_main())["new"])
+
+    @patch("tsmppt60_driver.base.requests.get")
+    def test_system_status_run(self, patched_get):
+        controller = DummyController()
+        patched_get.side_effect = controller.get
+        stop_event = threading.Event()
+
+        def _stop(event):
+            self._received.append(event)
+            stop_event.set()
+
+        self._events.on_change("Charge State", _stop)
+        system_status = SystemStatus("dummy.co.jp", events=self._events)
+        thread = threading.Thread(target=system_status.run, args=(0.01, False, stop_event))
+        thread.start()
+
+        deadline = time.monotonic() + 5.0
+        while "Charge State" not in self._events._last:
+            if time.monotonic() >= deadline:
+                stop_event.set()
+                thread.join()
+                self.fail("Charge State was not polled in time")
+            time.sleep(0.001)
+        controller._table["AHI=0&ALO={}&RHI=0&RLO=1".format(ModbusRegisterTable.CHARGE_STATE[0])] = "1,4,2,0,5"
+
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual((3, 5), (self._received[0]["old"], self._received[0]["new"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
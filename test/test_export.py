@@ -0,0 +1,169 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from dummy import EXPECTED
+
+from tsmppt60_driver.export import CsvSink, InfluxLineSink
+
+
+STATUS = {
+    "Battery Voltage": {"group": "Battery", "unit": "V", "value": 24.1},
+    "Charge State": {"group": "Condition", "unit": "", "value": 3},
+}
+
+
+class BlockingStream:
+    """Dummy stream to raise BlockingIOError until unblocked."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.data = ""
+
+    def write(self, data):
+        if self.blocks > 0:
+            self.blocks -= 1
+            raise BlockingIOError(11, "blocked", 0)
+        self.data += data
+        return len(data)
+
+
+class TestInfluxLineSink(unittest.TestCase):
+    """Test case for InfluxLineSink."""
+
+    def test_format(self):
+        sink = InfluxLineSink(io.StringIO(), tags={"host": "192.168.1.20"})
+
+        lines = sink.format(STATUS, 1700000000.0)
+
+        self.assertEqual(
+            [
+                "tsmppt60,host=192.168.1.20,label=Battery\\ Voltage,group=Battery,unit=V value=24.1 1700000000000000000\n",
+                "tsmppt60,host=192.168.1.20,label=Charge\\ State,group=Condition value=3.0 1700000000000000000\n",
+            ],
+            lines,
+        )
+
+    def test_flush_by_size(self):
+        stream = io.StringIO()
+        sink = InfluxLineSink(stream, max_points=4, max_interval=3600)
+
+        sink.write(STATUS, 1.0)
+        self.assertEqual("", stream.getvalue())
+
+        sink.write(STATUS, 2.0)
+        self.assertEqual(4, len(stream.getvalue().splitlines()))
+        self.assertEqual(1, sink.flushes)
+        self.assertEqual(4, sink.points)
+        self.assertGreater(sink.points_per_second, 0.0)
+
+    def test_flush_by_time(self):
+        stream = io.StringIO()
+        sink = InfluxLineSink(stream, max_points=1000, max_interval=0)
+
+        sink.write(STATUS, 1.0)
+
+        self.assertEqual(2, len(stream.getvalue().splitlines()))
+
+    def test_back_pressure(self):
+        stream = BlockingStream(blocks=3)
+        sink = InfluxLineSink(stream, max_points=2, max_interval=3600, max_pending=2)
+
+        sink.write(STATUS, 1.0)
+
+        self.assertEqual(0, stream.blocks)
+        self.assertEqual(2, len(stream.data.splitlines()))
+
+    def test_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            InfluxLineSink(io.StringIO(), max_pending=0)
+        with self.assertRaises(ValueError):
+            InfluxLineSink(io.StringIO(), max_points=0)
+
+    def test_max_pending_one(self):
+        stream = io.StringIO()
+        sink = InfluxLineSink(stream, max_points=1, max_pending=1)
+
+        sink.write(STATUS, 1.0)
+
+        self.assertEqual(2, len(stream.getvalue().splitlines()))
+
+    def test_value_type_of_all_labels(self):
+        lines = InfluxLineSink(io.StringIO()).format(EXPECTED, 1700000000.0)
+
+        self.assertEqual(len(EXPECTED), len(lines))
+        for line in lines:
+            value = line.split(" value=")[1].split(" ")[0]
+            self.assertFalse(value.endswith("i"), line)
+            float(value)
+
+    def test_block_timeout(self):
+        stream = BlockingStream(blocks=10**6)
+        sink = InfluxLineSink(stream, max_points=1, max_pending=1, block_timeout=0.05)
+
+        with self.assertRaises(TimeoutError):
+            sink.write(STATUS, 1.0)
+
+        stream.blocks = 0
+        sink.flush()
+
+        self.assertEqual(2, len(stream.data.splitlines()))
+
+    def test_flush_while_blocked(self):
+        stream = BlockingStream(blocks=10**6)
+        sink = InfluxLineSink(stream, max_points=1, max_pending=1, block_timeout=5.0)
+        thread = threading.Thread(target=sink.write, args=(STATUS, 1.0))
+        thread.start()
+
+        # flush() is not blocked by write() waiting for the buffer to drain.
+        time.sleep(0.05)
+        stream.blocks = 0
+        sink.flush()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(2, len(stream.data.splitlines()))
+
+    def test_skip_stale(self):
+        status = dict(STATUS)
+        status["Output Power"] = {"group": "Battery", "unit": "W", "value": 12.0, "stale": True, "age": 5.0}
+
+        lines = InfluxLineSink(io.StringIO()).format(status, 1.0)
+        rows = CsvSink(io.StringIO(), header=False).format(status, 1.0)
+
+        self.assertEqual(2, len(lines))
+        self.assertFalse([line for line in lines + rows if "Output Power" in line])
+
+
+class TestCsvSink(unittest.TestCase):
+    """Test case for CsvSink."""
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "status.csv")
+
+            with CsvSink(path) as sink:
+                sink.write(STATUS, 1.5)
+            with CsvSink(path) as sink:
+                sink.write(STATUS, 2.5)
+
+            with open(path) as f:
+                rows = f.read().splitlines()
+
+        self.assertEqual(
+            [
+                "timestamp,label,group,unit,value",
+                "1.5,Battery Voltage,Battery,V,24.1",
+                "1.5,Charge State,Condition,,3",
+                "2.5,Battery Voltage,Battery,V,24.1",
+                "2.5,Charge State,Condition,,3",
+            ],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import threading
+import time
+import unittest
+
+from tsmppt60_driver.governor import Governor
+
+
+class DummyTransport:
+    """Dummy transport to count the requests in flight."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.urls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=(5, 15)):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.urls.append(url)
+
+        time.sleep(self.delay)
+
+        with self._lock:
+            self.in_flight -= 1
+
+        if self.error is not None:
+            raise self.error
+        return "1,4,2,0,0"
+
+
+def _run(governor, count):
+    threads = [threading.Thread(target=governor.get, args=("u{}".format(i),)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestGovernor(unittest.TestCase):
+    """Test case for Governor."""
+
+    def test_max_in_flight(self):
+        transport = DummyTransport(delay=0.02)
+        governor = Governor(transport, max_in_flight=2)
+
+        _run(governor, 8)
+
+        self.assertEqual(2, transport.max_in_flight)
+        self.assertEqual(0, governor.in_flight)
+        self.assertEqual(2, governor.limit)
+        self.assertEqual(0.0, governor.error_rate)
+
+    def test_rate(self):
+        transport = DummyTransport()
+        governor = Governor(transport, max_in_flight=4, rate=50.0, burst=1)
+
+        started = time.monotonic()
+        _run(governor, 6)
+
+        # The first request uses the burst and the other 5 wait 1/50 seconds each.
+        self.assertGreaterEqual(time.monotonic() - started, 5 / 50.0 * 0.9)
+
+    def test_fair_order(self):
+        gate = threading.Event()
+        transport = DummyTransport()
+        transport.get_without_gate = transport.get
+        transport.get = lambda url, timeout: gate.wait() and transport.get_without_gate(url, timeout)
+        governor = Governor(transport, max_in_flight=1)
+        threads = []
+
+        # The first request holds the only slot and the others queue up in order.
+        for i in range(5):
+            thread = threading.Thread(target=governor.get, args=("u{}".format(i),))
+            thread.start()
+            threads.append(thread)
+            while len(governor._queue) < i or governor.in_flight < 1:
+                time.sleep(0.001)
+
+        gate.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(["u0", "u1", "u2", "u3", "u4"], transport.urls)
+
+    def test_decrease_on_error(self):
+        transport = DummyTransport(error=IOError("timeout"))
+        governor = Governor(transport, max_in_flight=4)
+
+        with self.assertRaises(IOError):
+            governor.get("u")
+
+        self.assertEqual(2, governor.limit)
+        self.assertEqual(1.0, governor.error_rate)
+
+        with self.assertRaises(IOError):
+            governor.get("u")
+        with self.assertRaises(IOError):
+            governor.get("u")
+
+        self.assertEqual(1, governor.limit)
+
+        transport.error = None
+        for _ in range(4):
+            governor.get("u")
+
+        self.assertGreaterEqual(governor.limit, 3)
+
+    def test_decrease_on_latency(self):
+        governor = Governor(DummyTransport(delay=0.02), max_in_flight=4, target_latency=0.01)
+
+        governor.get("u")
+
+        self.assertEqual(2, governor.limit)
+        self.assertGreater(governor.latency, 0.01)
+
+    def test_for_host(self):
+        governor = Governor.for_host("governor.co.jp", max_in_flight=3)
+
+        self.assertIs(governor, Governor.for_host("governor.co.jp"))
+        self.assertIsNot(governor, Governor.for_host("other.governor.co.jp"))
+        self.assertEqual(3, governor.limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+from unittest.mock import patch
+
+from dummy import DummyResponse
+
+from tsmppt60_driver.base import ManagementBase, ModbusRegisterTable
+from tsmppt60_driver.log import DailyLog
+
+
+def _record(hourmeter, vb_min, ah_daily):
+    values = [0] * ModbusRegisterTable.LOG_RECORD_REGISTERS
+    values[0] = hourmeter >> 16
+    values[1] = hourmeter & 0xFFFF
+    values[4] = vb_min
+    values[6] = ah_daily
+    return values
+
+
+class TestDailyLog(unittest.TestCase):
+    """Test case for DailyLog."""
+
+    @classmethod
+    def _requests_get(cls, url, timeout):
+        params = dict(p.split("=") for p in str(url).split("?")[-1].split("&"))
+        addr = int(params["AHI"]) << 8 | int(params["ALO"])
+        reg = int(params["RHI"]) << 8 | int(params["RLO"])
+
+        if addr < ModbusRegisterTable.LOG_START_ADDRESS:
+            shorts = [180, 0] if addr == 0x0000 else [80, 0]
+        else:
+            cls._requested.append((addr, reg))
+            offset = addr - ModbusRegisterTable.LOG_START_ADDRESS
+            shorts = cls._log[offset : offset + reg]
+            shorts += [0] * (reg - len(shorts))
+
+        body = []
+        for short in shorts:
+            body.extend([short >> 8, short & 255])
+
+        return DummyResponse(url, ",".join(str(v) for v in [1, 4, len(body)] + body))
+
+    def setUp(self):
+        TestDailyLog._requested = []
+        TestDailyLog._log = _record(24, 0x1100, 125) + _record(48, 0x1180, 130) + _record(72, 0x1200, 20)
+
+        patcher = patch("tsmppt60_driver.base.requests.get")
+        patched_get = patcher.start()
+        patched_get.side_effect = self._requests_get
+        self.addCleanup(patcher.stop)
+
+        self._mb = ManagementBase("dummy.co.jp")
+
+    def test_get_records(self):
+        log = DailyLog(self._mb, chunk_records=2)
+
+        records = list(log.get_records())
+
+        self.assertEqual([24, 48, 72], [r["Hourmeter"]["value"] for r in records])
+        self.assertEqual(12.5, records[0]["Amp Hours Daily"]["value"])
+        self.assertEqual(round(0x1100 * 180 / pow(2, 15), 2), records[0]["Battery Voltage Min"]["value"])
+        self.assertEqual("Log", records[0]["Battery Voltage Min"]["group"])
+        self.assertEqual("V", records[0]["Battery Voltage Min"]["unit"])
+        self.assertEqual(3, log.next_index)
+
+        # Two records per request: [0, 1] and [2, 3] where record 3 is empty.
+        size = ModbusRegisterTable.LOG_RECORD_REGISTERS
+        start = ModbusRegisterTable.LOG_START_ADDRESS
+        self.assertEqual([(start, 2 * size), (start + 2 * size, 2 * size)], self._requested)
+
+    def test_resume(self):
+        log = DailyLog(self._mb, chunk_records=4)
+
+        self.assertEqual(2, len(list(log.get_records(count=2))))
+        self.assertEqual(2, log.next_index)
+
+        TestDailyLog._log += _record(96, 0x1000, 10)
+        self._requested.clear()
+
+        records = list(log.get_records())
+
+        self.assertEqual([72, 96], [r["Hourmeter"]["value"] for r in records])
+        self.assertEqual(4, log.next_index)
+        self.assertEqual(ModbusRegisterTable.LOG_START_ADDRESS + 2 * 16, self._requested[0][0])
+
+    def test_wrap_around(self):
+        total = ModbusRegisterTable.LOG_RECORD_COUNT
+        TestDailyLog._log = sum((_record(24 * (i + 1), 0x1100, 10) for i in range(total)), [])
+        log = DailyLog(self._mb, chunk_records=4, next_index=total - 6, last_hourmeter=24 * total)
+
+        self.assertEqual([], list(log.get_records()))
+
+        log = DailyLog(self._mb, chunk_records=4, next_index=total - 6)
+        records = list(log.get_records(count=6))
+
+        self.assertEqual(6, len(records))
+        self.assertEqual(0, log.next_index)
+        self.assertEqual(24 * total, log.last_hourmeter)
+
+        # The controller wraps and overwrites the first two records.
+        size = ModbusRegisterTable.LOG_RECORD_REGISTERS
+        TestDailyLog._log[:size] = _record(24 * (total + 1), 0x1100, 10)
+        TestDailyLog._log[size : 2 * size] = _record(24 * (total + 2), 0x1100, 10)
+        self._requested.clear()
+
+        records = list(log.get_records())
+
+        self.assertEqual([24 * (total + 1), 24 * (total + 2)], [r["Hourmeter"]["value"] for r in records])
+        self.assertEqual(2, log.next_index)
+        self.assertEqual([(ModbusRegisterTable.LOG_START_ADDRESS, 4 * size)], self._requested)
+
+    def test_wrap_chunk_at_end(self):
+        total = ModbusRegisterTable.LOG_RECORD_COUNT
+        size = ModbusRegisterTable.LOG_RECORD_REGISTERS
+        TestDailyLog._log = sum((_record(24 * (i + 1), 0x1100, 10) for i in range(total)), [])
+        TestDailyLog._log[:size] = _record(24 * (total + 1), 0x1100, 10)
+
+        log = DailyLog(self._mb, chunk_records=4, next_index=total - 2)
+
+        self.assertEqual(3, len(list(log.get_records())))
+        start = ModbusRegisterTable.LOG_START_ADDRESS
+        self.assertEqual([(start + (total - 2) * size, 2 * size), (start, 4 * size)], self._requested)
+
+    def test_chunk_limit(self):
+        log = DailyLog(self._mb, chunk_records=100)
+
+        list(log.get_records())
+
+        for _, reg in self._requested:
+            self.assertLessEqual(reg, ModbusRegisterTable.MAX_READ_REGISTERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from datetime import datetime
+
+from tsmppt60_driver.metrics import DerivedMetrics
+
+
+def _status(array_voltage, array_current, output_power, amp_hours=100.0, kwh=10.0):
+    def _item(group, unit, value):
+        return {"group": group, "unit": unit, "value": value}
+
+    return {
+        "Array Voltage": _item("Array", "V", array_voltage),
+        "Array Current": _item("Array", "A", array_current),
+        "Output Power": _item("Battery", "W", output_power),
+        "Amp Hours": _item("Counter", "Ah", amp_hours),
+        "Kilowatt Hours": _item("Counter", "kWh", kwh),
+    }
+
+
+class TestDerivedMetrics(unittest.TestCase):
+    """Test case for DerivedMetrics."""
+
+    def setUp(self):
+        self._t0 = datetime(2024, 6, 1, 12, 0, 0).timestamp()
+        self._metrics = DerivedMetrics()
+
+    def test_power_and_efficiency(self):
+        derived = self._metrics.update(_status(50.0, 2.0, 90.0), self._t0)
+
+        self.assertEqual({"group": "Derived", "unit": "W", "value": 100.0}, derived["Array Power"])
+        self.assertEqual(90.0, derived["Conversion Efficiency"]["value"])
+        self.assertEqual(0.0, derived["Array Energy"]["value"])
+        self.assertNotIn("Running Efficiency", derived)
+
+    def test_trapezoidal_energy(self):
+        self._metrics.update(_status(50.0, 2.0, 90.0), self._t0)
+        derived = self._metrics.update(_status(50.0, 4.0, 190.0), self._t0 + 3600)
+
+        self.assertEqual(150.0, derived["Array Energy"]["value"])
+        self.assertEqual(140.0, derived["Output Energy"]["value"])
+        self.assertEqual(round(140.0 / 150.0 * 100.0, 2), derived["Running Efficiency"]["value"])
+        self.assertEqual(100.0, derived["Daily Array Power Min"]["value"])
+        self.assertEqual(200.0, derived["Daily Array Power Max"]["value"])
+        self.assertEqual(190.0, derived["Daily Output Power Peak"]["value"])
+
+    def test_daily_values_reset_on_next_day(self):
+        self._metrics.update(_status(50.0, 4.0, 190.0), self._t0)
+        derived = self._metrics.update(_status(50.0, 1.0, 40.0), self._t0 + 86400)
+
+        self.assertEqual(50.0, derived["Daily Array Power Max"]["value"])
+        self.assertEqual(40.0, derived["Daily Output Power Peak"]["value"])
+
+    def test_counter_reset(self):
+        self._metrics.update(_status(0.0, 0.0, 0.0, 100.0, 10.0), self._t0)
+        self._metrics.update(_status(0.0, 0.0, 0.0, 101.0, 12.0), self._t0 + 60)
+        derived = self._metrics.update(_status(0.0, 0.0, 0.0, 0.5, 1.0), self._t0 + 120)
+
+        self.assertEqual(1, derived["Counter Resets"]["value"])
+        self.assertEqual(3.0, derived["Counter Energy"]["value"])
+
+    def test_without_output_power(self):
+        status = _status(50.0, 2.0, 90.0)
+        del status["Output Power"]
+
+        derived = self._metrics.update(status, self._t0)
+
+        self.assertIn("Array Power", derived)
+        self.assertNotIn("Output Energy", derived)
+        self.assertNotIn("Conversion Efficiency", derived)
+
+        derived = self._metrics.update(status, self._t0 + 3600)
+
+        self.assertEqual(100.0, derived["Array Energy"]["value"])
+
+    def test_skip_stale(self):
+        self._metrics.update(_status(50.0, 2.0, 90.0), self._t0)
+        status = _status(50.0, 2.0, 90.0)
+        status["Output Power"].update({"stale": True, "age": 3600.0})
+
+        derived = self._metrics.update(status, self._t0 + 3600)
+
+        self.assertEqual(0.0, derived["Array Energy"]["value"])
+        self.assertNotIn("Output Energy", derived)
+
+        derived = self._metrics.update(_status(50.0, 2.0, 90.0), self._t0 + 7200)
+
+        self.assertEqual(0.0, derived["Array Energy"]["value"])
+        self.assertEqual(0.0, derived["Output Energy"]["value"])
+
+        derived = self._metrics.update(_status(50.0, 2.0, 90.0), self._t0 + 10800)
+
+        self.assertEqual(100.0, derived["Array Energy"]["value"])
+        self.assertEqual(90.0, derived["Running Efficiency"]["value"])
+
+
+if __name__ == "__main__":
+    unittest.main()
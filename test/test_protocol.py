@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+from dummy import DummyController
+
+from tsmppt60_driver.base import ManagementBase
+from tsmppt60_driver.protocol import (
+    ModbusRegisterTable,
+    Protocol,
+    compute_scaler,
+    decode_raw_value,
+    decode_response,
+    encode_request,
+)
+
+
+def _decode_all(args):
+    vscale, iscale, items = args
+    protocol = Protocol(vscale=vscale, iscale=iscale)
+    return [protocol.decode(param, body) for param, body in items]
+
+
+class TestProtocolFunctions(unittest.TestCase):
+    """Test case for the functions of protocol module."""
+
+    def test_encode_request(self):
+        self.assertEqual(encode_request(0x0026, 1), "ID=1&F=4&AHI=0&ALO=38&RHI=0&RLO=1")
+        self.assertEqual(encode_request(0x8010, 0x0140, unit_id=3, field=3), "ID=3&F=3&AHI=128&ALO=16&RHI=1&RLO=64")
+
+    def test_decode_response(self):
+        self.assertEqual(decode_response("1,4,2,17,160"), [4512])
+        self.assertEqual(decode_response(b"1,4,4,0,2,231,134"), [2, 59270])
+        self.assertEqual(decode_response("1,4,0"), [])
+
+    def test_decode_raw_value(self):
+        self.assertEqual(decode_raw_value([0xFFA8], 1), -88)
+        self.assertEqual(decode_raw_value([0x7FFF], 1), 32767)
+        self.assertEqual(decode_raw_value([0x0002, 0xE786], 2), 190342)
+
+    def test_compute_scaler(self):
+        self.assertAlmostEqual(compute_scaler([78, 934]), 78.01425, places=5)
+
+
+class TestProtocol(unittest.TestCase):
+    """Test case for Protocol."""
+
+    def setUp(self):
+        self._controller = DummyController()
+
+    def _respond(self, query):
+        return self._controller.get("http://dummy/MBCSV.cgi?" + query, timeout=None).text
+
+    def test_scalers(self):
+        protocol = Protocol(unit_id=2)
+        requests = protocol.scaler_requests()
+
+        self.assertEqual(
+            [param for param, _ in requests],
+            [ModbusRegisterTable.VOLTAGE_SCALING, ModbusRegisterTable.CURRENT_SCALING],
+        )
+        self.assertTrue(all(query.startswith("ID=2&") for _, query in requests))
+
+        for param, query in requests:
+            protocol.set_scaler(param, self._respond(query))
+
+        self.assertEqual((protocol.vscale, protocol.iscale), (180.0, 80.0))
+        self.assertEqual(protocol.scaler_requests(), [])
+
+        with self.assertRaises(ValueError):
+            protocol.set_scaler(ModbusRegisterTable.BATTERY_VOLTAGE, "1,4,2,0,0")
+
+    def test_decode(self):
+        protocol = Protocol(vscale=180.0, iscale=80.0)
+        expected = {
+            ModbusRegisterTable.BATTERY_VOLTAGE: 24.79,
+            ModbusRegisterTable.CHARGING_CURRENT: -0.21,
+            ModbusRegisterTable.POWER_LAST_SWEEP: 2.53,
+            ModbusRegisterTable.AH_CHARGE_RESETABLE: 19034.2,
+            ModbusRegisterTable.CHARGE_STATE: 3,
+        }
+
+        for param, value in expected.items():
+            self.assertEqual(protocol.decode(param, self._respond(protocol.request(param))), value)
+
+    def test_same_as_management_base(self):
+        with patch("tsmppt60_driver.base.requests.get", new=self._controller.get):
+            mb = ManagementBase("dummy")
+
+        protocol = mb.protocol
+        self.assertEqual((protocol.vscale, protocol.iscale), (180.0, 80.0))
+
+        with patch("tsmppt60_driver.base.requests.get", new=self._controller.get):
+            for param in DummyController.RESPONSES:
+                self.assertEqual(
+                    mb.get_scaled_value(param[0], param[1], param[3]),
+                    protocol.decode(param, self._respond(protocol.request(param))),
+                )
+
+    def test_event_loop(self):
+        params = [ModbusRegisterTable.BATTERY_VOLTAGE, ModbusRegisterTable.ARRAY_VOLTAGE]
+
+        async def fetch(query):
+            await asyncio.sleep(0)
+            return self._respond(query).encode("ascii")
+
+        async def poll():
+            protocol = Protocol()
+            scalers = protocol.scaler_requests()
+            bodies = await asyncio.gather(*[fetch(query) for _, query in scalers])
+            for (param, _), body in zip(scalers, bodies):
+                protocol.set_scaler(param, body)
+
+            bodies = await asyncio.gather(*[fetch(protocol.request(param)) for param in params])
+            return [protocol.decode(param, body) for param, body in zip(params, bodies)]
+
+        self.assertEqual(asyncio.run(poll()), [24.79, 0.46])
+
+    def test_process_pool(self):
+        items = list(DummyController.RESPONSES.items())
+        expected = _decode_all((180.0, 80.0, items))
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(_decode_all, [(180.0, 80.0, items[:8]), (180.0, 80.0, items[8:])]))
+
+        self.assertEqual(results[0] + results[1], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+
+from dummy import EXPECTED, DummyController
+
+from tsmppt60_driver import SystemStatus
+from tsmppt60_driver.result import Layout, Reading, Snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test case for Reading, Layout and Snapshot."""
+
+    def setUp(self):
+        self._layout = Layout.of([("Battery Voltage", "Battery", "V"), ("Charge State", "Condition", "Numbers")])
+        self._snapshot = Snapshot(self._layout, [24.79, 3], 1700000000.0)
+
+    def test_layout_is_shared(self):
+        layout = Layout.of((("Battery Voltage", "Battery", "V"), ("Charge State", "Condition", "Numbers")))
+
+        self.assertIs(self._layout, layout)
+
+    def test_access_by_label(self):
+        self.assertEqual(24.79, self._snapshot.value("Battery Voltage"))
+        self.assertIsNone(self._snapshot.value("Sweep Vmp"))
+        self.assertEqual(Reading("Charge State", "Condition", "Numbers", 3), self._snapshot["Charge State"])
+        self.assertIn("Charge State", self._snapshot)
+        self.assertEqual(["Battery Voltage", "Charge State"], list(self._snapshot))
+
+        with self.assertRaises(KeyError):
+            self._snapshot["Sweep Vmp"]
+
+    def test_to_dict(self):
+        self.assertEqual(
+            {
+                "Battery Voltage": {"group": "Battery", "unit": "V", "value": 24.79},
+                "Charge State": {"group": "Condition", "unit": "Numbers", "value": 3},
+            },
+            self._snapshot.to_dict(),
+        )
+        self.assertEqual({"group": "Battery", "unit": "V", "value": 24.79}, self._snapshot["Battery Voltage"].to_dict())
+
+    def test_number_of_values(self):
+        with self.assertRaises(ValueError):
+            Snapshot(self._layout, [24.79])
+
+    @patch("tsmppt60_driver.base.requests.get")
+    def test_get_snapshot(self, patched_get):
+        patched_get.side_effect = DummyController().get
+        system_status = SystemStatus("dummy.co.jp")
+
+        snapshot = system_status.get_snapshot(False)
+
+        self.assertEqual(EXPECTED, snapshot.to_dict())
+        self.assertIs(snapshot.layout, system_status.get_snapshot(False).layout)
+        self.assertIsNotNone(snapshot.timestamp)
+
+
+if __name__ == "__main__":
+    unittest.main()
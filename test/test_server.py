@@ -0,0 +1,130 @@
+import gzip
+import json
+import time
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from dummy import EXPECTED, DummyController
+
+from tsmppt60_driver.__main__ import parse_args
+from tsmppt60_driver.base import ModbusRegisterTable
+from tsmppt60_driver.server import StatusServer
+
+
+class TestStatusServer(unittest.TestCase):
+    """Test case for StatusServer."""
+
+    def setUp(self):
+        patcher = patch("tsmppt60_driver.base.requests.get")
+        patched_get = patcher.start()
+        self._controller = DummyController()
+        patched_get.side_effect = self._controller.get
+        self.addCleanup(patcher.stop)
+
+        self._server = StatusServer(["dummy.co.jp"], interval=3600, bind="127.0.0.1", port=0)
+        self._server.start()
+        self.addCleanup(self._server.shutdown)
+
+        deadline = time.monotonic() + 5.0
+        while self._server.get_document("/dummy.co.jp") is None:
+            if time.monotonic() >= deadline:
+                self.fail("status of dummy.co.jp was not polled in time")
+            time.sleep(0.001)
+
+    def _get(self, path, headers=None):
+        url = "http://127.0.0.1:{}{}".format(self._server.port, path)
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}))
+
+    def test_get_host(self):
+        with self._get("/dummy.co.jp") as res:
+            self.assertEqual("application/json", res.headers["Content-Type"])
+            document = json.loads(res.read())
+
+        self.assertEqual(EXPECTED, document["status"])
+        self.assertAlmostEqual(time.time(), document["timestamp"], delta=60)
+        self.assertNotIn("error", document)
+
+    def test_get_all(self):
+        with self._get("/") as res:
+            self.assertEqual(EXPECTED, json.loads(res.read())["dummy.co.jp"]["status"])
+
+    def test_poll_error(self):
+        with self._get("/dummy.co.jp") as res:
+            etag = res.headers["ETag"]
+            polled = json.loads(res.read())["timestamp"]
+
+        self._controller.fail(ModbusRegisterTable.BATTERY_VOLTAGE, IOError("timeout"))
+        with self.assertRaises(IOError):
+            self._server.poll("dummy.co.jp")
+
+        with self._get("/dummy.co.jp", {"If-None-Match": etag}) as res:
+            document = json.loads(res.read())
+
+        self.assertEqual(EXPECTED, document["status"])
+        self.assertEqual(polled, document["timestamp"])
+        self.assertEqual("OSError('timeout')", document["error"]["message"])
+        self.assertAlmostEqual(document["error"]["timestamp"] - polled, document["error"]["age"])
+
+        self._controller.fail(ModbusRegisterTable.BATTERY_VOLTAGE, None)
+        self._server.poll("dummy.co.jp")
+
+        with self._get("/dummy.co.jp") as res:
+            self.assertNotIn("error", json.loads(res.read()))
+
+    def test_never_answered(self):
+        def factory(host):
+            raise IOError("unreachable")
+
+        server = StatusServer(["other.co.jp"], bind="127.0.0.1", port=0, system_status_factory=factory)
+        self.addCleanup(server.shutdown)
+
+        with self.assertRaises(IOError):
+            server.poll("other.co.jp")
+
+        document = json.loads(server.get_document("/other.co.jp").body)
+
+        self.assertIsNone(document["status"])
+        self.assertIsNone(document["timestamp"])
+        self.assertIsNone(document["error"]["age"])
+
+    def test_gzip(self):
+        with self._get("/dummy.co.jp", {"Accept-Encoding": "gzip"}) as res:
+            self.assertEqual("gzip", res.headers["Content-Encoding"])
+            self.assertEqual(EXPECTED, json.loads(gzip.decompress(res.read()))["status"])
+
+    def test_etag(self):
+        with self._get("/dummy.co.jp") as res:
+            etag = res.headers["ETag"]
+
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self._get("/dummy.co.jp", {"If-None-Match": etag})
+        self.assertEqual(304, cm.exception.code)
+
+        with self._get("/dummy.co.jp", {"If-None-Match": '"other"'}) as res:
+            self.assertEqual(200, res.status)
+
+        self.assertEqual(3, self._server.requests_served)
+
+    def test_not_found(self):
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self._get("/unknown.co.jp")
+        self.assertEqual(404, cm.exception.code)
+
+
+class TestMain(unittest.TestCase):
+    """Test case for the command line interface."""
+
+    def test_parse_serve(self):
+        args = parse_args(["serve", "192.168.1.20", "192.168.1.21", "--port", "8000", "--interval", "5"])
+
+        self.assertEqual("serve", args.command)
+        self.assertEqual(["192.168.1.20", "192.168.1.21"], args.hosts)
+        self.assertEqual(8000, args.port)
+        self.assertEqual(5.0, args.interval)
+        self.assertFalse(args.limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
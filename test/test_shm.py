@@ -0,0 +1,144 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from dummy import EXPECTED, DummyController
+
+from tsmppt60_driver import SystemStatus
+from tsmppt60_driver.result import Snapshot
+from tsmppt60_driver.shm import SnapshotPublisher, SnapshotReader, get_full_layout
+
+
+class TestSharedMemory(unittest.TestCase):
+    """Test case for SnapshotPublisher and SnapshotReader."""
+
+    def setUp(self):
+        patcher = patch("tsmppt60_driver.base.requests.get")
+        patched_get = patcher.start()
+        patched_get.side_effect = DummyController().get
+        self.addCleanup(patcher.stop)
+
+        self._system_status = SystemStatus("dummy.co.jp")
+        self._publisher = SnapshotPublisher(self._system_status)
+        self.addCleanup(self._publisher.close)
+
+        self._reader = SnapshotReader(self._publisher.name)
+        self.addCleanup(self._reader.close)
+
+    def test_layout(self):
+        self.assertIs(get_full_layout(), self._system_status.get_snapshot(False).layout)
+
+    def test_read_before_publish(self):
+        self.assertIsNone(self._reader.read())
+        self.assertEqual(0, self._reader.version)
+
+    def test_publish_and_read(self):
+        published = self._publisher.publish()
+
+        snapshot = self._reader.read()
+
+        self.assertEqual(2, self._reader.version)
+        self.assertEqual(EXPECTED, snapshot.to_dict())
+        self.assertIsInstance(snapshot.value("Charge State"), int)
+        self.assertIs(published.layout, snapshot.layout)
+        self.assertEqual(published.timestamp, snapshot.timestamp)
+
+    def test_publish_limited(self):
+        self._publisher.publish(self._system_status.get_snapshot(True))
+
+        snapshot = self._reader.read()
+
+        self.assertEqual(self._system_status.get(True), snapshot.to_dict())
+
+    def test_run(self):
+        stop_event = threading.Event()
+        thread = threading.Thread(target=self._publisher.run, args=(0.01, stop_event))
+        thread.start()
+
+        deadline = time.monotonic() + 5.0
+        while self._reader.version < 4 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        stop_event.set()
+        thread.join()
+
+        if self._reader.version < 4:
+            self.fail("snapshot was not published twice in time")
+
+        self.assertEqual(EXPECTED, self._reader.read().to_dict())
+
+    def test_concurrent_publish_and_read(self):
+        first = self._system_status.get_snapshot(False)
+        second = Snapshot(first.layout, [v + 1 for v in first.values], first.timestamp)
+        expected = [first.to_dict(), second.to_dict()]
+        stop_event = threading.Event()
+
+        def publish():
+            while not stop_event.is_set():
+                self._publisher.publish(first)
+                self._publisher.publish(second)
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+
+        try:
+            reads = 0
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline:
+                self.assertIn(self._reader.read().to_dict(), expected)
+                reads += 1
+        finally:
+            stop_event.set()
+            thread.join()
+
+        self.assertGreater(reads, 0)
+
+    def test_stale(self):
+        snapshot = self._system_status.get_snapshot(False)
+        snapshot.stale = {"Battery Voltage": {"age": 5.0, "error": "OSError('timeout')"}}
+        self._publisher.publish(snapshot)
+
+        read = self._reader.read()
+
+        self.assertTrue(read.is_stale("Battery Voltage"))
+        self.assertFalse(read.is_stale("Charge State"))
+        self.assertEqual(24.79, read.value("Battery Voltage"))
+        self.assertIsInstance(read.value("Charge State"), int)
+
+    def test_layout_without_loggers(self):
+        logger = logging.getLogger("BatteryStatus")
+        handlers = len(logger.handlers)
+
+        SnapshotReader(self._publisher.name).close()
+
+        self.assertEqual(handlers, len(logger.handlers))
+
+    def test_reader_process_keeps_segment(self):
+        self._publisher.publish()
+        code = "from tsmppt60_driver.shm import SnapshotReader; SnapshotReader({!r}).read()".format(
+            self._publisher.name
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+
+        subprocess.run([sys.executable, "-c", code], env=env, check=True, timeout=30)
+        # The resource tracker of the reader process removes its segments after the process exits.
+        time.sleep(0.5)
+
+        with SnapshotReader(self._publisher.name) as reader:
+            self.assertEqual(EXPECTED, reader.read().to_dict())
+
+    def test_layout_mismatch(self):
+        self._publisher._shm.buf[16] = 0
+
+        with self.assertRaises(ValueError):
+            SnapshotReader(self._publisher.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
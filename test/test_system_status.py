@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import patch
+
+from dummy import EXPECTED, DummyController
+
+from tsmppt60_driver import SystemStatus
+from tsmppt60_driver.base import HttpTransport, ModbusRegisterTable
+from tsmppt60_driver.metrics import DerivedMetrics
+
+
+class TestSystemStatus(unittest.TestCase):
+    """Test case for SystemStatus."""
+
+    def setUp(self):
+        self._controller = DummyController()
+
+        patcher = patch("tsmppt60_driver.base.requests.get")
+        patched_get = patcher.start()
+        patched_get.side_effect = self._controller.get
+        self.addCleanup(patcher.stop)
+
+    def test_get(self):
+        status = SystemStatus("dummy.co.jp").get(False)
+
+        self.assertEqual(EXPECTED, status)
+        self.assertEqual(list(EXPECTED), list(status))
+
+    def test_get_with_metrics(self):
+        system_status = SystemStatus("dummy.co.jp", metrics=DerivedMetrics())
+
+        status = system_status.get(False)
+
+        self.assertEqual(EXPECTED, {label: item for label, item in status.items() if label in EXPECTED})
+        self.assertEqual({"group": "Derived", "unit": "W", "value": 0.0}, status["Array Power"])
+        self.assertEqual(0.0, status["Output Energy"]["value"])
+        self.assertEqual(0, status["Counter Resets"]["value"])
+        self.assertNotIn("Array Power", system_status.get_snapshot(False))
+
+    def test_get_concurrently(self):
+        self._controller.delay = 0.01
+
+        with SystemStatus("dummy.co.jp", max_workers=3) as system_status:
+            status = system_status.get(False)
+            self.assertEqual(EXPECTED, status)
+            self.assertEqual(list(EXPECTED), list(status))
+
+            # The pool is reused by the next call.
+            self.assertEqual(EXPECTED, system_status.get(False))
+
+        self.assertGreater(self._controller.max_in_flight, 1)
+        self.assertLessEqual(self._controller.max_in_flight, 3)
+
+    def test_get_fails_by_default(self):
+        system_status = SystemStatus("dummy.co.jp")
+        self._controller.fail(ModbusRegisterTable.ARRAY_VOLTAGE, IOError("timeout"))
+
+        with self.assertRaises(IOError):
+            system_status.get(False)
+
+    def test_get_tolerant(self):
+        system_status = SystemStatus("dummy.co.jp", tolerant=True)
+        self.assertEqual(EXPECTED, system_status.get(False))
+
+        self._controller.fail(ModbusRegisterTable.ARRAY_VOLTAGE, IOError("timeout"))
+        self._controller.fail(ModbusRegisterTable.LED_STATE, IndexError("list index out of range"))
+
+        status = system_status.get(False)
+
+        self.assertEqual(
+            {"group": "Array", "unit": "V", "value": 0.46, "stale": True, "error": "OSError('timeout')"},
+            {k: v for k, v in status["Array Voltage"].items() if k != "age"},
+        )
+        self.assertGreaterEqual(status["Array Voltage"]["age"], 0.0)
+        self.assertEqual(11, status["LED State"]["value"])
+        self.assertTrue(status["LED State"]["stale"])
+        self.assertEqual(EXPECTED["Battery Voltage"], status["Battery Voltage"])
+
+        self._controller.fail(ModbusRegisterTable.ARRAY_VOLTAGE, None)
+        self._controller.fail(ModbusRegisterTable.LED_STATE, None)
+
+        self.assertEqual(EXPECTED, system_status.get(False))
+
+    def test_get_tolerant_without_last_good(self):
+        self._controller.delay = 0.001
+        self._controller.fail(ModbusRegisterTable.OUTPUT_POWER, IOError("timeout"))
+
+        with SystemStatus("dummy.co.jp", max_workers=2, tolerant=True) as system_status:
+            snapshot = system_status.get_snapshot(False)
+
+        self.assertIsNone(snapshot.value("Output Power"))
+        self.assertTrue(snapshot.is_stale("Output Power"))
+        self.assertFalse(snapshot.is_stale("Battery Voltage"))
+        self.assertEqual({"age": None, "error": "OSError('timeout')"}, snapshot.stale["Output Power"])
+
+
+class DummyGateway:
+    """Dummy gateway to dispatch the requests to the units by MODBUS ID, used as requests.Session."""
+
+    def __init__(self, units):
+        self.units = units
+        self.ids = []
+
+    def get(self, url, timeout):
+        unit_id = int(str(url).split("?")[-1].split("&")[0].split("=")[1])
+        self.ids.append(unit_id)
+        return self.units[unit_id].get(url, timeout)
+
+
+class TestSystemStatusUnits(unittest.TestCase):
+    """Test case for SystemStatus with several units behind one host."""
+
+    def setUp(self):
+        unit2 = DummyController()
+        unit2._table = dict(unit2._table)
+        unit2._table["AHI=0&ALO=0&RHI=0&RLO=2"] = "1,4,4,0,90,0,0"  # VOLTAGE_SCALING
+        self._gateway = DummyGateway({1: DummyController(), 2: unit2})
+        self._transport = HttpTransport(self._gateway)
+
+    def test_get(self):
+        system_status = SystemStatus("dummy.co.jp", transport=self._transport, unit_ids=[1, 2])
+        self._gateway.ids.clear()
+
+        status = system_status.get(False)
+
+        self.assertEqual([1, 2], list(status))
+        self.assertEqual(EXPECTED, status[1])
+        self.assertEqual(round(0x11A0 * 90 / pow(2, 15), 2), status[2]["Battery Voltage"]["value"])
+        self.assertEqual(EXPECTED["Charge Current"], status[2]["Charge Current"])
+        self.assertEqual([1, 2] * len(EXPECTED), self._gateway.ids)
+
+    def test_get_snapshot_tolerant(self):
+        self._gateway.units[2].delay = 0.001
+        system_status = SystemStatus(
+            "dummy.co.jp", transport=self._transport, unit_ids=[1, 2], tolerant=True, max_workers=2
+        )
+        system_status.get_snapshot(False)
+        self._gateway.units[2].fail(ModbusRegisterTable.BATTERY_VOLTAGE, IOError("timeout"))
+
+        snapshots = system_status.get_snapshot(False)
+
+        self.assertIsNone(snapshots[1].stale)
+        self.assertTrue(snapshots[2].is_stale("Battery Voltage"))
+        self.assertEqual(round(0x11A0 * 90 / pow(2, 15), 2), snapshots[2].value("Battery Voltage"))
+        self.assertIs(snapshots[1].layout, snapshots[2].layout)
+
+    def test_invalid_unit_ids(self):
+        with self.assertRaises(ValueError):
+            SystemStatus("dummy.co.jp", transport=self._transport, unit_ids=[])
+        with self.assertRaises(ValueError):
+            SystemStatus("dummy.co.jp", transport=self._transport, unit_ids=[1, 1])
+
+    def test_devices_not_iterable(self):
+        system_status = SystemStatus("dummy.co.jp", transport=self._transport, unit_ids=[1, 2])
+
+        with self.assertRaises(TypeError):
+            len(system_status)
+        with self.assertRaises(TypeError):
+            list(system_status)
+
+        self.assertEqual(5, len(SystemStatus("dummy.co.jp", transport=self._transport)))
+
+
+if __name__ == "__main__":
+    unittest.main()
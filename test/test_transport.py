@@ -0,0 +1,54 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from dummy import EXPECTED, DummyController
+
+from tsmppt60_driver import SystemStatus
+from tsmppt60_driver.transport import RecordingTransport, ReplayTransport
+
+
+class TestRecordReplay(unittest.TestCase):
+    """Test case for RecordingTransport and ReplayTransport."""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self._path = os.path.join(self._dir.name, "session.jsonl.gz")
+
+        with patch("tsmppt60_driver.base.requests.get") as patched_get:
+            patched_get.side_effect = DummyController(delay=0.02).get
+
+            with RecordingTransport(self._path) as transport:
+                SystemStatus("dummy.co.jp", transport=transport).get(False)
+
+    @patch("tsmppt60_driver.base.requests.get")
+    def test_replay_without_wait(self, patched_get):
+        transport = ReplayTransport(self._path, speed=None)
+
+        status = SystemStatus("dummy.co.jp", transport=transport)
+
+        self.assertEqual(EXPECTED, status.get(False))
+        self.assertEqual(EXPECTED, status.get(False))
+        patched_get.assert_not_called()
+
+    def test_replay_with_scaled_timing(self):
+        transport = ReplayTransport(self._path, speed=2.0)
+
+        started = time.monotonic()
+        SystemStatus("dummy.co.jp", transport=transport).get(False)
+
+        # 17 requests of 0.02 seconds at double speed.
+        self.assertGreaterEqual(time.monotonic() - started, 17 * 0.01)
+
+    def test_replay_unknown_url(self):
+        transport = ReplayTransport(self._path, speed=None, loop=False)
+
+        with self.assertRaises(LookupError):
+            SystemStatus("unknown.co.jp", transport=transport)
+
+
+if __name__ == "__main__":
+    unittest.main()
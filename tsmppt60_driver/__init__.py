@@ -1,4 +1,18 @@
-from tsmppt60_driver.base import ManagementBase
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from tsmppt60_driver.aggregate import Aggregator, SlidingWindow, TumblingWindow  # noqa: F401
+from tsmppt60_driver.base import HttpTransport, ManagementBase  # noqa: F401
+from tsmppt60_driver.events import EventBus  # noqa: F401
+from tsmppt60_driver.export import CsvSink, InfluxLineSink  # noqa: F401
+from tsmppt60_driver.governor import Governor  # noqa: F401
+from tsmppt60_driver.log import DailyLog  # noqa: F401
+from tsmppt60_driver.metrics import DerivedMetrics  # noqa: F401
+from tsmppt60_driver.protocol import Protocol  # noqa: F401
+from tsmppt60_driver.result import Layout, Reading, Snapshot  # noqa: F401
+from tsmppt60_driver.shm import SnapshotPublisher, SnapshotReader  # noqa: F401
 from tsmppt60_driver.status import (
     BatteryStatus,
     CountersStatus,
@@ -6,6 +20,7 @@ from tsmppt60_driver.status import (
     SolarArrayStatus,
     TemperaturesStatus,
 )
+from tsmppt60_driver.transport import RecordingTransport, ReplayTransport  # noqa: F401
 
 
 """TS-MPPT-60 driver library to get all devices status data."""
@@ -45,15 +60,103 @@ class SystemStatus(object):
          'Target Voltage': {'group': 'Battery', 'unit': 'V', 'value': 28.6},
          'LED State': {'group': 'Condition', 'value': 11, 'unit': ''},
          'Charge State': {'group': 'Condition', 'value': 3, 'unit': ''}}
+
+    Derived values like array power, efficiency and energy are added to the
+    result with DerivedMetrics object.
+
+        print(SystemStatus("192.168.1.20", metrics=DerivedMetrics()).get(False))
+
+    The registers are read one by one by default. With max_workers, they are
+    read concurrently on a thread pool kept by this object, and max_workers
+    caps the number of requests in flight to the controller.
+
+        with SystemStatus("192.168.1.20", max_workers=2) as status:
+            print(status.get(False))
+
+    get_snapshot() returns the same values as a compact Snapshot object
+    instead of dict of dict, which is cheaper to keep many of.
+
+        snapshot = SystemStatus("192.168.1.20").get_snapshot(False)
+        print(snapshot.value("Battery Voltage"), snapshot["Charge State"])
+
+    Any error while reading a register aborts get() by default. With
+    tolerant=True, the other values are still returned and the failed label
+    has its last good value with its age in seconds and the error.
+
+        {'Battery Voltage': {'group': 'Battery', 'unit': 'V', 'value': 24.01,
+                             'stale': True, 'age': 5.02, 'error': "ReadTimeout(...)"},
+         ...}
+
+    The sinks, aggregation windows and derived metrics skip stale labels,
+    so the last good value isn't recorded again as a new measurement.
+    SnapshotReader keeps the stale mark of them.
+
+    With EventBus object, the watchers of label transitions and threshold
+    crossings are notified once per get() or get_snapshot(). run() polls
+    the controller at a fixed interval for them.
+
+        events = EventBus()
+        events.on_change("Charge State", print)
+        SystemStatus("192.168.1.20", events=events).run(interval=1.0)
+
+    Several units chained behind one gateway host are polled by one object
+    with unit_ids. They share one transport with a persistent connection,
+    each unit keeps its own scalers, and their reads are interleaved. The
+    results are keyed by unit ID.
+
+        print(SystemStatus("192.168.1.20", unit_ids=[1, 2]).get())
+
+        {1: {'Amp Hours': {'group': 'Counter', 'unit': 'Ah', 'value': 18097.9}, ...},
+         2: {'Amp Hours': {'group': 'Counter', 'unit': 'Ah', 'value': 9120.4}, ...}}
+
+    len() and iteration over the status objects are not supported with
+    unit_ids and raise TypeError, because the objects belong to one unit.
     """
 
-    def __init__(self, host):
+    def __init__(
+        self,
+        host,
+        metrics=None,
+        max_workers=None,
+        transport=None,
+        tolerant=False,
+        events=None,
+        unit_ids=None,
+    ):
         """Initialize class object.
 
         Keyword arguments:
         host -- TS-MPPT-60 host address like "192.168.1.20"
+        metrics -- DerivedMetrics object to add the derived labels to get() result
+        max_workers -- maximum number of concurrent requests, registers are read sequentially if None
+        transport -- object to send requests like RecordingTransport, HttpTransport if None
+        tolerant -- if True, failed labels get the last good value instead of raising the error
+        events -- EventBus object to notify of the events found in each poll
+        unit_ids -- list of MODBUS IDs of the units behind the host, results are keyed by them if given
         """
-        _mb = ManagementBase(host)
+        if unit_ids is not None:
+            if not unit_ids or len(set(unit_ids)) != len(unit_ids):
+                raise ValueError("unit_ids must be unique and not empty")
+            if metrics is not None or events is not None:
+                raise ValueError("metrics and events are not supported with unit_ids")
+            if transport is None:
+                transport = HttpTransport(requests.Session())
+
+        if unit_ids is None:
+            self._mbs = [ManagementBase(host, transport=transport)]
+        else:
+            self._mbs = [ManagementBase(host, transport=transport, unit_id=unit_id) for unit_id in unit_ids]
+
+        self._unit_ids = unit_ids
+        _mb = self._mbs[0]
+        self._mb = _mb
+        self._metrics = metrics
+        self._max_workers = max_workers
+        self._executor = None
+        self._plans = {}
+        self._tolerant = tolerant
+        self._last_good = {}
+        self._events = events
 
         self._devices = (
             BatteryStatus(_mb),
@@ -80,19 +183,154 @@ class SystemStatus(object):
         Keyword arguments:
         is_limit -- limit the number of getting status
         """
-        status_dict = {}
+        if self._unit_ids is not None:
+            return {unit_id: snapshot.to_dict() for unit_id, snapshot in self.get_snapshot(is_limit).items()}
 
-        for device in self._devices:
-            for status in device.get_status_all(is_limit):
-                label = status.pop("label")
-                status_dict[label] = status
+        status_dict = self.get_snapshot(is_limit).to_dict()
+
+        if self._metrics is not None:
+            status_dict.update(self._metrics.update(status_dict))
 
         return status_dict
 
+    def get_snapshot(self, is_limit=True):
+        """Get and return all status of devices as Snapshot object, or dict of them keyed by unit ID with unit_ids.
+
+        Derived labels of the metrics object are not included.
+
+        Keyword arguments:
+        is_limit -- limit the number of getting status
+        """
+        snapshots = self._read_snapshots(is_limit)
+
+        if self._unit_ids is not None:
+            return snapshots
+
+        snapshot = snapshots[self._mb.unit_id]
+
+        if self._events is not None:
+            self._events.evaluate(snapshot)
+
+        return snapshot
+
+    def run(self, interval=1.0, is_limit=True, stop_event=None):
+        """Poll the controller every interval seconds until the stop event is set.
+
+        Keyword arguments:
+        interval -- seconds between the polls
+        is_limit -- limit the number of getting status
+        stop_event -- threading.Event object to stop, runs forever if None
+        """
+        while stop_event is None or not stop_event.is_set():
+            started = time.monotonic()
+            self.get_snapshot(is_limit)
+            wait = max(0.0, interval - (time.monotonic() - started))
+
+            if stop_event is None:
+                time.sleep(wait)
+            else:
+                stop_event.wait(wait)
+
+    def _read_snapshots(self, is_limit):
+        """Read all params of all units and return dict of Snapshot objects keyed by unit ID."""
+        layout, reads = self._get_plan(is_limit)
+        read = self._try_read_value if self._tolerant else self._read_value
+        results = self._read_values(read, reads)
+        now = time.time()
+        snapshots = {}
+
+        # Reads are interleaved as param major and unit minor.
+        for i, mb in enumerate(self._mbs):
+            unit_results = results[i :: len(self._mbs)]
+
+            if self._tolerant:
+                snapshots[mb.unit_id] = self._to_tolerant_snapshot(mb.unit_id, layout, unit_results, now)
+            else:
+                snapshots[mb.unit_id] = Snapshot(layout, unit_results, now)
+
+        return snapshots
+
+    def _to_tolerant_snapshot(self, unit_id, layout, results, now):
+        """Return Snapshot object with the last good values of the failed labels."""
+        values = []
+        stale = {}
+
+        for label, (value, error) in zip(layout.labels, results):
+            if error is None:
+                self._last_good[unit_id, label] = (value, now)
+            else:
+                value, got_at = self._last_good.get((unit_id, label), (None, None))
+                age = None if got_at is None else round(now - got_at, 3)
+                stale[label] = {"age": age, "error": repr(error)}
+
+            values.append(value)
+
+        return Snapshot(layout, values, now, stale or None)
+
+    def _get_plan(self, is_limit):
+        """Return the shared layout and the list of (ManagementBase, param) to read.
+
+        Params are in the order of devices and their params, and the units are
+        interleaved for each param.
+        """
+        plan = self._plans.get(is_limit)
+
+        if plan is None:
+            fields = []
+            params = []
+            for device in self._devices:
+                for param in device.get_params(is_limit):
+                    fields.append((param[2], str(device), param[1]))
+                    params.append(param)
+            reads = [(mb, param) for param in params for mb in self._mbs]
+            plan = self._plans[is_limit] = (Layout.of(fields), reads)
+
+        return plan
+
+    @staticmethod
+    def _read_value(read):
+        mb, (address, scale_factor, _, register) = read
+        return mb.get_scaled_value(address, scale_factor, register)
+
+    def _try_read_value(self, read):
+        """Return (value, None) if succeeded, or (None, error) if failed."""
+        try:
+            return self._read_value(read), None
+        except Exception as e:
+            return None, e
+
+    def _read_values(self, read, params):
+        """Read and return the values of the params with read function in the same order."""
+        if not self._max_workers:
+            return [read(param) for param in params]
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+
+        return list(self._executor.map(read, params))
+
+    def close(self):
+        """Shut down the thread pool used to read registers concurrently."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _check_single_unit(self):
+        if self._unit_ids is not None:
+            raise TypeError("status objects are not available with unit_ids")
+
     def __len__(self):
+        self._check_single_unit()
         return len(self._devices)
 
     def __iter__(self):
+        self._check_single_unit()
         self._index = 0
         return self
 
@@ -0,0 +1,46 @@
+import argparse
+import logging
+
+from tsmppt60_driver.server import StatusServer
+
+
+"""Command line interface of TS-MPPT-60 driver like "python -m tsmppt60_driver serve 192.168.1.20"."""
+
+
+def parse_args(args=None):
+    """Parse and return the command line arguments.
+
+    Keyword arguments:
+    args -- list of argument strings, sys.argv is used if None
+    """
+    parser = argparse.ArgumentParser(prog="python -m tsmppt60_driver", description="TS-MPPT-60 driver commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="poll controllers and serve the latest status as JSON over HTTP")
+    serve.add_argument("hosts", nargs="+", help='TS-MPPT-60 host addresses like "192.168.1.20"')
+    serve.add_argument("--bind", default="", help="address to bind the server to")
+    serve.add_argument("--port", type=int, default=8080, help="port number to listen")
+    serve.add_argument("--interval", type=float, default=1.0, help="seconds between the polls of each host")
+    serve.add_argument("--limit", action="store_true", help="limit the number of getting status")
+    serve.add_argument("--debug", action="store_true", help="enable debug log")
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Run the command.
+
+    Keyword arguments:
+    args -- list of argument strings, sys.argv is used if None
+    """
+    args = parse_args(args)
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    if args.command == "serve":
+        server = StatusServer(args.hosts, interval=args.interval, is_limit=args.limit, bind=args.bind, port=args.port)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+import collections
+import math
+import time
+
+from tsmppt60_driver.result import Snapshot
+
+
+"""TS-MPPT-60 driver module to aggregate status snapshots into windows."""
+
+
+# Labels whose values are states instead of quantities, aggregated with mode and last value.
+ENUM_LABELS = ("LED State", "Charge State")
+
+
+def _iter_items(status):
+    """Generate (label, group, unit, value) from SystemStatus.get() result or Snapshot object.
+
+    The value is None for stale labels, so the last good value is not counted again.
+    """
+    if isinstance(status, Snapshot):
+        layout = status.layout
+        items = zip(layout.labels, layout.groups, layout.units, status.values)
+        if not status.stale:
+            return items
+        return ((label, group, unit, None if label in status.stale else value) for label, group, unit, value in items)
+    return (
+        (label, item["group"], item["unit"], None if item.get("stale") else item["value"])
+        for label, item in status.items()
+    )
+
+
+class _Stats(object):
+    """Min, max, sum, count and last value of a numeric label in a tumbling window."""
+
+    __slots__ = ("group", "unit", "count", "sum", "min", "max", "last")
+
+    def __init__(self, group, unit):
+        self.group = group
+        self.unit = unit
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def add(self, timestamp, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+        self.last = value
+
+    def result(self):
+        return {"count": self.count, "min": self.min, "max": self.max, "mean": self.sum / self.count, "last": self.last}
+
+
+class _ModeStats(object):
+    """Counts of each state and last state of an enum label in a tumbling window."""
+
+    __slots__ = ("group", "unit", "count", "counts", "last")
+
+    def __init__(self, group, unit):
+        self.group = group
+        self.unit = unit
+        self.count = 0
+        self.counts = {}
+        self.last = None
+
+    def add(self, timestamp, value):
+        self.count += 1
+        self.counts[value] = self.counts.get(value, 0) + 1
+        self.last = value
+
+    def mode(self):
+        # The last state wins a tie.
+        return max(self.counts, key=lambda v: (self.counts[v], v == self.last))
+
+    def result(self):
+        return {"count": self.count, "mode": self.mode(), "last": self.last}
+
+
+class _SlidingStats(object):
+    """Numeric label in a sliding window with monotonic deques for min and max."""
+
+    __slots__ = ("group", "unit", "samples", "mins", "maxs", "sum")
+
+    def __init__(self, group, unit):
+        self.group = group
+        self.unit = unit
+        self.samples = collections.deque()
+        self.mins = collections.deque()
+        self.maxs = collections.deque()
+        self.sum = 0.0
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    def add(self, timestamp, value):
+        self.samples.append((timestamp, value))
+        self.sum += value
+
+        while self.mins and self.mins[-1][1] > value:
+            self.mins.pop()
+        self.mins.append((timestamp, value))
+
+        while self.maxs and self.maxs[-1][1] < value:
+            self.maxs.pop()
+        self.maxs.append((timestamp, value))
+
+    def evict(self, before):
+        while self.samples and self.samples[0][0] < before:
+            self.sum -= self.samples.popleft()[1]
+        while self.mins and self.mins[0][0] < before:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] < before:
+            self.maxs.popleft()
+
+    def result(self):
+        count = len(self.samples)
+        return {
+            "count": count,
+            "min": self.mins[0][1],
+            "max": self.maxs[0][1],
+            "mean": self.sum / count,
+            "last": self.samples[-1][1],
+        }
+
+
+class _SlidingModeStats(_ModeStats):
+    """Enum label in a sliding window."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, group, unit):
+        _ModeStats.__init__(self, group, unit)
+        self.samples = collections.deque()
+
+    def add(self, timestamp, value):
+        _ModeStats.add(self, timestamp, value)
+        self.samples.append((timestamp, value))
+
+    def evict(self, before):
+        while self.samples and self.samples[0][0] < before:
+            value = self.samples.popleft()[1]
+            self.count -= 1
+            self.counts[value] -= 1
+            if not self.counts[value]:
+                del self.counts[value]
+
+
+class _Window(object):
+    """Abstract class of a window kept per label."""
+
+    _STATS = None
+    _MODE_STATS = None
+
+    def __init__(self, name, enum_labels):
+        self.name = name
+        self._enum_labels = frozenset(enum_labels)
+        self._states = {}
+
+    def _new_state(self, label, group, unit):
+        cls = self._MODE_STATS if label in self._enum_labels else self._STATS
+        state = self._states[label] = cls(group, unit)
+        return state
+
+    def _add(self, timestamp, status):
+        states = self._states
+        for label, group, unit, value in _iter_items(status):
+            if value is None:
+                continue
+            state = states.get(label)
+            if state is None:
+                state = self._new_state(label, group, unit)
+            state.add(timestamp, value)
+
+    def _records(self, start, end):
+        records = []
+        for label, state in self._states.items():
+            if state.count:
+                record = {
+                    "window": self.name,
+                    "start": start,
+                    "end": end,
+                    "label": label,
+                    "group": state.group,
+                    "unit": state.unit,
+                }
+                record.update(state.result())
+                records.append(record)
+        return records
+
+
+class TumblingWindow(_Window):
+    """Class to aggregate each label into back-to-back windows aligned to multiples of size.
+
+    Each update costs O(1) per label. A window is closed and returned by
+    update() when a sample of the next window arrives.
+
+    Keyword arguments:
+    size -- window length in seconds like 60
+    enum_labels -- labels aggregated with mode and last value
+    """
+
+    _STATS = _Stats
+    _MODE_STATS = _ModeStats
+
+    def __init__(self, size, enum_labels=ENUM_LABELS):
+        """Initialize TumblingWindow class object.
+
+        Keyword arguments:
+        size -- window length in seconds like 60
+        enum_labels -- labels aggregated with mode and last value
+        """
+        _Window.__init__(self, "tumbling_{}".format(size), enum_labels)
+        self.size = size
+        self._start = None
+
+    def update(self, timestamp, status):
+        """Add one status and return the list of records of the window closed by it.
+
+        Keyword arguments:
+        timestamp -- UNIX time the status was got at
+        status -- SystemStatus.get() result or Snapshot object
+        """
+        start = math.floor(timestamp / self.size) * self.size
+        closed = []
+
+        if self._start is not None and start > self._start:
+            closed = self.flush()
+
+        self._start = start
+        self._add(timestamp, status)
+
+        return closed
+
+    def flush(self):
+        """Close the current window and return its records."""
+        if self._start is None:
+            return []
+
+        records = self._records(self._start, self._start + self.size)
+        self._states = {}
+        self._start = None
+
+        return records
+
+
+class SlidingWindow(_Window):
+    """Class to aggregate each label over the last size seconds, closed every step seconds.
+
+    Samples are kept while they are in the window, and min and max are kept
+    with monotonic deques, so each update costs amortized O(1) per label.
+
+    Keyword arguments:
+    size -- window length in seconds like 3600
+    step -- seconds between the ends of windows like 60
+    enum_labels -- labels aggregated with mode and last value
+    """
+
+    _STATS = _SlidingStats
+    _MODE_STATS = _SlidingModeStats
+
+    def __init__(self, size, step, enum_labels=ENUM_LABELS):
+        """Initialize SlidingWindow class object.
+
+        Keyword arguments:
+        size -- window length in seconds like 3600
+        step -- seconds between the ends of windows like 60
+        enum_labels -- labels aggregated with mode and last value
+        """
+        _Window.__init__(self, "sliding_{}_{}".format(size, step), enum_labels)
+        self.size = size
+        self.step = step
+        self._end = None
+
+    def _close(self):
+        start = self._end - self.size
+
+        for state in self._states.values():
+            state.evict(start)
+
+        records = self._records(start, self._end)
+        self._end += self.step
+
+        return records
+
+    def update(self, timestamp, status):
+        """Add one status and return the list of records of the windows closed by it.
+
+        Keyword arguments:
+        timestamp -- UNIX time the status was got at
+        status -- SystemStatus.get() result or Snapshot object
+        """
+        next_end = (math.floor(timestamp / self.step) + 1) * self.step
+        closed = []
+
+        if self._end is not None:
+            while self._end < next_end:
+                records = self._close()
+                closed.extend(records)
+
+                if not records:
+                    # Nothing left in the window, skip the empty ones.
+                    self._end = max(self._end, next_end)
+
+        self._end = next_end
+        self._add(timestamp, status)
+
+        return closed
+
+
+class Aggregator(object):
+    """Class to feed SystemStatus results into several windows at once. Use this like below.
+
+        aggregator = Aggregator([TumblingWindow(60), TumblingWindow(3600), SlidingWindow(900, 60)])
+        system_status = SystemStatus("192.168.1.20")
+
+        while True:
+            for record in aggregator.update(system_status.get_snapshot(False)):
+                print(record)
+
+        {'window': 'tumbling_60', 'start': 1700000040, 'end': 1700000100,
+         'label': 'Battery Voltage', 'group': 'Battery', 'unit': 'V',
+         'count': 60, 'min': 24.1, 'max': 24.3, 'mean': 24.2, 'last': 24.3}
+        {'window': 'tumbling_60', 'start': 1700000040, 'end': 1700000100,
+         'label': 'Charge State', 'group': 'Condition', 'unit': 'Numbers',
+         'count': 60, 'mode': 5, 'last': 5}
+
+    Call flush() before exiting to get the records of the tumbling windows not closed yet.
+    """
+
+    def __init__(self, windows):
+        """Initialize Aggregator class object.
+
+        Keyword arguments:
+        windows -- list of TumblingWindow or SlidingWindow objects
+        """
+        self._windows = list(windows)
+
+    def update(self, status, timestamp=None):
+        """Add one status to all windows and return the list of records of closed windows.
+
+        Keyword arguments:
+        status -- SystemStatus.get() result or Snapshot object
+        timestamp -- UNIX time the status was got at, timestamp of Snapshot or current time if None
+        """
+        if timestamp is None:
+            timestamp = getattr(status, "timestamp", None)
+        if timestamp is None:
+            timestamp = time.time()
+
+        closed = []
+        for window in self._windows:
+            closed.extend(window.update(timestamp, status))
+
+        return closed
+
+    def flush(self):
+        """Close the current tumbling windows and return their records."""
+        closed = []
+        for window in self._windows:
+            if isinstance(window, TumblingWindow):
+                closed.extend(window.flush())
+
+        return closed
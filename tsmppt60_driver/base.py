@@ -2,6 +2,16 @@ import logging
 
 import requests
 
+from tsmppt60_driver.protocol import (
+    DEFAULT_UNIT_ID,
+    ModbusRegisterTable,
+    Protocol,
+    compute_scaler,
+    decode_raw_value,
+    decode_response,
+    encode_request,
+)
+
 
 """TS-MPPT-60 driver's base modules."""
 
@@ -37,53 +47,62 @@ class Logger(object):
             self.logger.setLevel(logging.INFO)
 
 
-class ModbusRegisterTable(object):
-    """MODBUS register settings table."""
+class HttpTransport(object):
+    """Class to send requests to TS-MPPT-60 over HTTP. This is used by ManagementBase by default.
+
+    Keyword arguments:
+    session -- requests.Session object to keep the connection, requests.get is used if None
+    """
+
+    def __init__(self, session=None):
+        """Initialize HttpTransport class object.
+
+        Keyword arguments:
+        session -- requests.Session object to keep the connection, requests.get is used if None
+        """
+        self._session = session
 
-    VOLTAGE_SCALING_HIGH = (0x0000, "", "Voltage Scaling High", 1)
-    VOLTAGE_SCALING_LOW = (0x0001, "", "Voltage Scaling Low", 1)
-    CURRENT_SCALING_HIGH = (0x0002, "", "Current Scaling High", 1)
-    CURRENT_SCALING_LOW = (0x0003, "", "Current Scaling Low", 1)
-    VOLTAGE_SCALING = (0x0000, "", "Voltage Scaling", 2)
-    CURRENT_SCALING = (0x0002, "", "Current Scaling", 2)
-    SOFTWARE_VERSION = (0x0004, "Numbers", "Software Version", 1)
+    def get(self, url, timeout=(5, 15)):
+        """Send GET request and return the response body string like "1,4,2,0,0".
 
-    BATTERY_VOLTAGE = (0x0026, "V", "Battery Voltage", 1)
-    CHARGING_CURRENT = (0x0027, "A", "Charge Current", 1)
-    TARGET_REGULATION_VOLTAGE = (0x0033, "V", "Target Voltage", 1)
-    OUTPUT_POWER = (0x003A, "W", "Output Power", 1)
-    ARRAY_VOLTAGE = (0x001B, "V", "Array Voltage", 1)
-    ARRAY_CURRENT = (0x001D, "A", "Array Current", 1)
-    VMP_LAST_SWEEP = (0x003D, "V", "Sweep Vmp", 1)
-    VOC_LAST_SWEEP = (0x003E, "V", "Sweep Voc", 1)
-    POWER_LAST_SWEEP = (0x003C, "W", "Sweep Pmax", 1)
-    HEATSINK_TEMP = (0x0023, "C", "Heat Sink Temperature", 1)
-    BATTERY_TEMP = (0x0025, "C", "Battery Temperature", 1)
-    AH_CHARGE_RESETABLE = (0x0034, "Ah", "Amp Hours", 2)
-    KWH_CHARGE_RESETABLE = (0x0038, "kWh", "Kilowatt Hours", 1)
+        Keyword arguments:
+        url -- URL including the query string
+        timeout -- timeout given to requests
+        """
+        if self._session is None:
+            res = requests.get(url, timeout=timeout)
+        else:
+            res = self._session.get(url, timeout=timeout)
 
-    LED_STATE = (0x0031, "Numbers", "LED State", 1)
-    CHARGE_STATE = (0x0032, "Numbers", "Charge State", 1)
+        return res.text
 
 
 class ManagementBase(object):
-    """Class to get raw data from TS-MPPT-60. MODBUS ID is fixed to 1 as written on data sheet TSMPPT.APP_.Modbus.EN_.10.2.pdf.
+    """Class to get raw data from TS-MPPT-60. MODBUS ID is 1 by default as written on data sheet TSMPPT.APP_.Modbus.EN_.10.2.pdf.
+
+    Give unit_id to talk to another unit chained behind the same host.
+    Encoding, decoding and scaling are done by Protocol object, and this
+    class only sends the requests with the transport.
 
     Keyword arguments:
     host -- host name like dummy.co.jp
     cgi -- cgi script file name
     debug -- debug message output is enabled if True
+    transport -- object to send requests like HttpTransport
+    unit_id -- MODBUS ID of the unit
     """
 
-    _ID_MODBUS = 0x01
+    _ID_MODBUS = DEFAULT_UNIT_ID
 
-    def __init__(self, host, cgi="MBCSV.cgi", debug=False):
+    def __init__(self, host, cgi="MBCSV.cgi", debug=False, transport=None, unit_id=_ID_MODBUS):
         """Initialize class object.
 
         Keyword arguments:
         host -- Host address like "192.168.1.20" of TS-MPPT-60 live view
         cgi -- CGI file name to get the information
         debug -- If True, logging is enabled.
+        transport -- object to send requests, HttpTransport if None
+        unit_id -- MODBUS ID of the unit
         """
         self._logger = logging.getLogger(type(self).__name__)
         self._logger.addHandler(logging.StreamHandler())
@@ -91,17 +110,32 @@ class ManagementBase(object):
         if debug:
             self._logger.setLevel(logging.DEBUG)
 
+        self._transport = HttpTransport() if transport is None else transport
+        self._unit_id = unit_id
         self._url = "http://" + host + "/" + cgi
-        self._vscale = self._compute_scaler(ModbusRegisterTable.VOLTAGE_SCALING)
-        self._iscale = self._compute_scaler(ModbusRegisterTable.CURRENT_SCALING)
-
-    def _get(self, addr, reg, mbid=_ID_MODBUS, field=4):
+        self._protocol = Protocol(
+            unit_id,
+            vscale=self._compute_scaler(ModbusRegisterTable.VOLTAGE_SCALING),
+            iscale=self._compute_scaler(ModbusRegisterTable.CURRENT_SCALING),
+        )
+
+    @property
+    def unit_id(self):
+        """MODBUS ID of the unit."""
+        return self._unit_id
+
+    @property
+    def protocol(self):
+        """Protocol object with the scalers of this unit."""
+        return self._protocol
+
+    def _get(self, addr, reg, mbid=None, field=4):
         """Get and return raw data string like "1,4,1,1,1" against MBID, Address, Register, and Field.
 
         Keyword arguments:
         addr -- Address to get information
         reg -- Register to get information
-        mbid -- MBID
+        mbid -- MBID, unit_id if None
         field -- Field to get information
 
         >>> mb._get(addr=0x0000, reg=1)
@@ -109,46 +143,27 @@ class ManagementBase(object):
         >>> mb._get(addr=0x0001, reg=1)
         '1,4,2,0,0'
         """
-        params = []
-        params.append("ID=" + str(mbid))
-        params.append("F=" + str(field))
-        params.append("AHI=" + str(addr >> 8))
-        params.append("ALO=" + str(addr & 255))
-        params.append("RHI=" + str(reg >> 8))
-        params.append("RLO=" + str(reg & 255))
+        if mbid is None:
+            mbid = self._unit_id
 
-        res = requests.get("{0}?{1}".format(self._url, "&".join(params)), timeout=(5, 15))
+        query = encode_request(addr, reg, mbid, field)
 
-        return res.text
+        return self._transport.get("{0}?{1}".format(self._url, query), timeout=(5, 15))
 
-    def _read_modbus(self, address, register, mbid=_ID_MODBUS):
+    def _read_modbus(self, address, register, mbid=None):
         """Read and return the value string with short integer (ex. 16bit value) against MBID, Address, and Register.
 
         Keyword arguments:
         address -- Address to get information
         register -- Register to get information
-        mbid -- MBID
+        mbid -- MBID, unit_id if None
 
         >>> mb._read_modbus(0x0000, 1)
         [0]
         >>> mb._read_modbus(0x0001, 1)
         [0]
         """
-        raw_value_str = self._get(address, register, mbid)
-        raw_values = [int(v) for v in raw_value_str.split(",")]
-        idx_max = raw_values[2]
-        raw_values = raw_values[3:]
-        idx = 0
-        ret = []
-
-        while idx < idx_max:
-            ret_short = raw_values[idx] << 8
-            idx += 1
-            ret_short += raw_values[idx]
-            idx += 1
-            ret.append(ret_short)
-
-        return ret
+        return decode_response(self._get(address, register, mbid))
 
     def _compute_scaler(self, param):
         """Compute and return the voltage/current scaler as written on data sheet page 8 or 25.
@@ -171,8 +186,7 @@ class ManagementBase(object):
         >>> mb._compute_scaler(ModbusRegisterTable.CURRENT_SCALING)
         0.0
         """
-        values = self._read_modbus(param[0], param[3])
-        return float(values[0]) + (float(values[1]) / pow(2, 16))
+        return compute_scaler(self._read_modbus(param[0], param[3]))
 
     def get_raw_value(self, address, register):
         """Return a raw value against address got from TS-MPPT-60.
@@ -189,18 +203,25 @@ class ManagementBase(object):
         >>> mb.get_raw_value(0x0027, 1)
         0
         """
-        values = self._read_modbus(address, register)
+        return self.decode_raw_value(self._read_modbus(address, register), register)
 
-        if register > 1:
-            raw_value = (values[0] << 16) | (values[1] & 0xFFFF)
-        else:
-            raw_value = values[0]
-            raw_value &= 0xFFFF
-            if raw_value & 0x8000:
-                raw_value ^= 0xFFFF
-                raw_value = -1 * (raw_value + 1)
+    @staticmethod
+    def decode_raw_value(values, register):
+        """Return a raw value decoded from the short integers read from TS-MPPT-60.
 
-        return raw_value
+        Keyword arguments:
+        values -- list of 16bit values like [0, 2]
+        register -- number of registers the value consists of
+
+        Returns:
+            Raw value as integer type.
+
+        >>> mb.decode_raw_value([0xFFA8], 1)
+        -88
+        >>> mb.decode_raw_value([0x0002, 0xE786], 2)
+        190342
+        """
+        return decode_raw_value(values, register)
 
     def get_scaled_value(self, address, scale_factor, register):
         """Calculate and return a scaled status value against address got from TS-MPPT-60.
@@ -218,21 +239,22 @@ class ManagementBase(object):
         >>> mb.get_scaled_value(0x0027, "A", 1)
         0.0
         """
-        raw_value = self.get_raw_value(address, register)
-
-        if scale_factor == "V":
-            scaled_value = raw_value * self._vscale / pow(2, 15)
-        elif scale_factor == "A":
-            scaled_value = raw_value * self._iscale / pow(2, 15)
-        elif scale_factor == "W":
-            wscale = self._iscale * self._vscale
-            scaled_value = raw_value * wscale / pow(2, 17)
-        elif scale_factor == "Ah":
-            scaled_value = raw_value / 10.0
-        else:
-            scaled_value = raw_value
+        return self.scale_raw_value(self.get_raw_value(address, register), scale_factor)
+
+    def scale_raw_value(self, raw_value, scale_factor):
+        """Calculate and return a scaled value from a raw value with this controller's scalers.
 
-        return round(scaled_value, 2)
+        Keyword arguments:
+        raw_value -- raw value returned by get_raw_value() or decode_raw_value()
+        scale_factor -- unit string
+
+        Returns:
+            Scaled value like 12.4 against your expecting.
+
+        >>> mb.scale_raw_value(2550, "Ah")
+        255.0
+        """
+        return self._protocol.scale(raw_value, scale_factor)
 
 
 if __name__ == "__main__":
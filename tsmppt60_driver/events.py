@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+
+from tsmppt60_driver.result import Snapshot
+
+
+"""TS-MPPT-60 driver module to notify watchers of state transitions and threshold crossings."""
+
+
+class _Subscription(object):
+    """One registered watcher of a label."""
+
+    __slots__ = ("label", "kind", "deliver", "above", "below", "hysteresis", "is_above", "is_below")
+
+    def __init__(self, label, kind, deliver, above=None, below=None, hysteresis=0.0):
+        self.label = label
+        self.kind = kind
+        self.deliver = deliver
+        self.above = above
+        self.below = below
+        self.hysteresis = hysteresis
+        self.is_above = False
+        self.is_below = False
+
+    def check(self, old, new):
+        """Return the list of event types fired by the value change from old to new."""
+        if self.kind == "change":
+            return ["change"] if old is not None and old != new else []
+
+        fired = []
+
+        if self.above is not None:
+            if not self.is_above and new > self.above:
+                self.is_above = True
+                fired.append("above")
+            elif self.is_above and new <= self.above - self.hysteresis:
+                self.is_above = False
+
+        if self.below is not None:
+            if not self.is_below and new < self.below:
+                self.is_below = True
+                fired.append("below")
+            elif self.is_below and new >= self.below + self.hysteresis:
+                self.is_below = False
+
+        return fired
+
+
+class EventBus(object):
+    """Class to evaluate the watchers once per poll and notify them of the events like below.
+
+        {'type': 'change', 'label': 'Charge State', 'old': 3, 'new': 5, 'timestamp': 1700000000.0}
+        {'type': 'below', 'label': 'Battery Voltage', 'old': 24.1, 'new': 23.9, 'timestamp': 1700000000.0}
+
+    Give this to SystemStatus and run its poll loop, so one poll serves all
+    watchers. Watchers are kept per label and only the watched labels are
+    checked.
+
+        events = EventBus()
+        events.on_change("Charge State", print)
+        events.on_threshold("Battery Voltage", print, below=24.0, hysteresis=0.2)
+
+        SystemStatus("192.168.1.20", events=events).run(interval=1.0)
+
+    A "change" event fires when the value differs from the previous poll. An
+    "above" or "below" event fires once when the value crosses the threshold,
+    including the first poll, and again only after the value came back over
+    the threshold by hysteresis.
+
+    Watchers can be added and removed from any thread while the poll loop
+    evaluates them.
+    """
+
+    def __init__(self):
+        """Initialize EventBus class object."""
+        self._logger = logging.getLogger(type(self).__name__)
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._last = {}
+
+    def _subscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.setdefault(subscription.label, []).append(subscription)
+        return subscription
+
+    def on_change(self, label, callback):
+        """Call the callback with the event when the value of the label changes, and return the subscription.
+
+        Keyword arguments:
+        label -- label string like "Charge State"
+        callback -- callable to receive the event dict
+        """
+        return self._subscribe(_Subscription(label, "change", callback))
+
+    def on_threshold(self, label, callback, above=None, below=None, hysteresis=0.0):
+        """Call the callback with the event when the value of the label crosses the thresholds, and return the subscription.
+
+        Keyword arguments:
+        label -- label string like "Battery Voltage"
+        callback -- callable to receive the event dict
+        above -- "above" event fires when the value gets greater than this
+        below -- "below" event fires when the value gets less than this
+        hysteresis -- margin the value must come back by before the event fires again
+        """
+        if above is None and below is None:
+            raise ValueError("above or below must be given")
+
+        return self._subscribe(_Subscription(label, "threshold", callback, above, below, hysteresis))
+
+    @staticmethod
+    def to_queue(queue, loop):
+        """Return a callback to put the events into asyncio.Queue from the thread polling the controller.
+
+            queue = asyncio.Queue()
+            events.on_change("Charge State", EventBus.to_queue(queue, asyncio.get_running_loop()))
+
+        Keyword arguments:
+        queue -- asyncio.Queue object
+        loop -- event loop the queue belongs to
+        """
+
+        def _put(event):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        return _put
+
+    def unsubscribe(self, subscription):
+        """Remove the subscription returned by on_change() or on_threshold().
+
+        Keyword arguments:
+        subscription -- subscription object to remove
+        """
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.label, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+
+    def evaluate(self, status, timestamp=None):
+        """Check all watchers against one poll result, notify them and return the list of fired events.
+
+        Keyword arguments:
+        status -- Snapshot object or SystemStatus.get() result
+        timestamp -- UNIX time the status was got at, timestamp of Snapshot or current time if None
+        """
+        if timestamp is None:
+            timestamp = getattr(status, "timestamp", None) or time.time()
+
+        fired = []
+
+        # The callbacks are called without the lock, so they can add or remove watchers.
+        with self._lock:
+            watched = [
+                (label, list(subscriptions)) for label, subscriptions in self._subscriptions.items() if subscriptions
+            ]
+
+        for label, subscriptions in watched:
+            if isinstance(status, Snapshot):
+                new = status.value(label)
+            else:
+                new = status[label]["value"] if label in status else None
+
+            if new is None:
+                continue
+
+            old = self._last.get(label)
+            self._last[label] = new
+
+            for subscription in subscriptions:
+                for kind in subscription.check(old, new):
+                    event = {"type": kind, "label": label, "old": old, "new": new, "timestamp": timestamp}
+                    fired.append(event)
+
+                    try:
+                        subscription.deliver(event)
+                    except Exception:
+                        self._logger.exception("failed to notify %s event of %s", kind, label)
+
+        return fired
@@ -0,0 +1,272 @@
+import csv
+import io
+import threading
+import time
+
+
+"""TS-MPPT-60 driver module to export status snapshots to files or streams."""
+
+
+class BufferedSink(object):
+    """Abstract class to buffer SystemStatus.get() results and write them out in batches.
+
+    The buffered points are flushed when max_points points are buffered or
+    max_interval seconds passed since the last flush. Both are checked only
+    by write(), so the points of a sink which stops receiving writes stay
+    buffered until flush() or close() is called. If the output can not take
+    the data (ex. non-blocking stream raising BlockingIOError) the points
+    stay buffered, and write() blocks until the buffer drains once
+    max_pending points are waiting, raising TimeoutError if it doesn't
+    drain in block_timeout seconds. Use this like below.
+
+        with InfluxLineSink("status.lp", max_points=500) as sink:
+            sink.write(SystemStatus("192.168.1.20").get())
+            print(sink.points_per_second)
+    """
+
+    _RETRY_WAIT = 0.01
+
+    def __init__(self, output, max_points=1000, max_interval=10.0, max_pending=None, block_timeout=60.0):
+        """Initialize BufferedSink class object.
+
+        Keyword arguments:
+        output -- file path to append to, or any object having write()
+        max_points -- number of points to trigger flush
+        max_interval -- seconds since last flush to trigger flush
+        max_pending -- number of points to block write() until flushed, 10 times of max_points if None
+        block_timeout -- seconds write() blocks for the buffer to drain before raising TimeoutError
+        """
+        if max_points < 1:
+            raise ValueError("max_points must be 1 or more")
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be 1 or more")
+
+        if isinstance(output, str):
+            self._stream = open(output, "a", newline="")
+            self._is_own_stream = True
+        else:
+            self._stream = output
+            self._is_own_stream = False
+
+        self._max_points = max_points
+        self._max_interval = max_interval
+        self._max_pending = max_points * 10 if max_pending is None else max_pending
+        self._block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._buffer = []
+        self._pending = ""
+        self._pending_points = 0
+        self._last_flush = time.monotonic()
+
+        self._points = 0
+        self._flushes = 0
+        self._started = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def format(self, status, timestamp):
+        """Return the list of formatted lines of the status.
+
+        Keyword arguments:
+        status -- dict object returned by SystemStatus.get()
+        timestamp -- UNIX time the status was got at
+        """
+        raise NotImplementedError
+
+    def write(self, status, timestamp=None):
+        """Buffer one SystemStatus.get() result and flush if needed.
+
+        Keyword arguments:
+        status -- dict object returned by SystemStatus.get()
+        timestamp -- UNIX time the status was got at, current time if None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        lines = self.format(status, timestamp)
+
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+
+            self._buffer.extend(lines)
+            self._points += len(lines)
+
+            is_due = time.monotonic() - self._last_flush >= self._max_interval
+            if len(self._buffer) + self._pending_points >= self._max_points or is_due:
+                self._flush()
+
+            # Waiting releases the lock, so flush() and close() from other threads are not blocked.
+            deadline = None
+            while len(self._buffer) + self._pending_points >= self._max_pending:
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + self._block_timeout
+                elif now >= deadline:
+                    raise TimeoutError("output did not drain in {} seconds".format(self._block_timeout))
+
+                self._drained.wait(min(self._RETRY_WAIT, deadline - now))
+                self._flush()
+
+    def _flush(self):
+        """Write out the buffered points. Must be called with the lock held."""
+        if self._buffer:
+            self._pending += "".join(self._buffer)
+            self._pending_points += len(self._buffer)
+            self._buffer = []
+
+        self._last_flush = time.monotonic()
+
+        if not self._pending:
+            return
+
+        try:
+            self._stream.write(self._pending)
+        except BlockingIOError as e:
+            try:
+                written = e.characters_written
+            except AttributeError:
+                written = 0
+            self._pending = self._pending[written:]
+            self._pending_points = self._pending.count("\n")
+            return
+
+        self._pending = ""
+        self._pending_points = 0
+        self._flushes += 1
+        self._drained.notify_all()
+
+        if hasattr(self._stream, "flush"):
+            self._stream.flush()
+
+    def flush(self):
+        """Write out all the buffered points now."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flush and close the output if it was opened by this object."""
+        self.flush()
+
+        if self._is_own_stream:
+            self._stream.close()
+
+    @property
+    def points(self):
+        """Number of points written to this sink."""
+        return self._points
+
+    @property
+    def flushes(self):
+        """Number of successful flushes."""
+        return self._flushes
+
+    @property
+    def points_per_second(self):
+        """Throughput in points per second since the first write."""
+        if self._started is None:
+            return 0.0
+
+        elapsed = time.monotonic() - self._started
+        return self._points / elapsed if elapsed > 0 else 0.0
+
+
+class InfluxLineSink(BufferedSink):
+    """Class to export the status as InfluxDB line protocol like below.
+
+        tsmppt60,label=Battery\\ Voltage,group=Battery,unit=V value=24.1 1700000000000000000
+        tsmppt60,label=Charge\\ State,group=Condition,unit=Numbers value=3.0 1700000000000000000
+
+    The value field is always written as float, because InfluxDB accepts
+    only one type per field of a measurement.
+    """
+
+    def __init__(self, output, measurement="tsmppt60", tags=None, **kwargs):
+        """Initialize InfluxLineSink class object.
+
+        Keyword arguments:
+        output -- file path to append to, or any object having write()
+        measurement -- measurement name
+        tags -- dict object of extra tags like {"host": "192.168.1.20"}
+        kwargs -- keyword arguments given to BufferedSink
+        """
+        BufferedSink.__init__(self, output, **kwargs)
+
+        self._prefix = self._escape(measurement, ", ")
+        for key, value in sorted((tags or {}).items()):
+            self._prefix += ",{}={}".format(self._escape(key), self._escape(value))
+
+    @staticmethod
+    def _escape(value, chars=", ="):
+        value = str(value)
+        for c in chars:
+            value = value.replace(c, "\\" + c)
+        return value
+
+    @staticmethod
+    def _format_value(value):
+        return repr(float(value))
+
+    def format(self, status, timestamp):
+        ns = int(timestamp * 1e9)
+        lines = []
+
+        for label, item in status.items():
+            if item["value"] is None or item.get("stale"):
+                continue
+            tags = ",label={},group={}".format(self._escape(label), self._escape(item["group"]))
+            if item["unit"]:
+                tags += ",unit=" + self._escape(item["unit"])
+            lines.append("{}{} value={} {}\n".format(self._prefix, tags, self._format_value(item["value"]), ns))
+
+        return lines
+
+
+class CsvSink(BufferedSink):
+    """Class to export the status as CSV rows like below.
+
+        timestamp,label,group,unit,value
+        1700000000.0,Battery Voltage,Battery,V,24.1
+
+    The header row is written only when the output is empty.
+    """
+
+    HEADER = ("timestamp", "label", "group", "unit", "value")
+
+    def __init__(self, output, header=True, **kwargs):
+        """Initialize CsvSink class object.
+
+        Keyword arguments:
+        output -- file path to append to, or any object having write()
+        header -- if True, the header row is written when the output is empty
+        kwargs -- keyword arguments given to BufferedSink
+        """
+        BufferedSink.__init__(self, output, **kwargs)
+
+        if header and self._is_empty():
+            self._buffer.append(self._row(self.HEADER))
+
+    def _is_empty(self):
+        try:
+            return self._stream.tell() == 0
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return True
+
+    @staticmethod
+    def _row(values):
+        line = io.StringIO()
+        csv.writer(line, lineterminator="\n").writerow(values)
+        return line.getvalue()
+
+    def format(self, status, timestamp):
+        return [
+            self._row((timestamp, label, item["group"], item["unit"], item["value"]))
+            for label, item in status.items()
+            if item["value"] is not None and not item.get("stale")
+        ]
@@ -0,0 +1,178 @@
+import collections
+import threading
+import time
+
+from tsmppt60_driver.base import HttpTransport
+
+
+"""TS-MPPT-60 driver module to keep the number and rate of requests to a controller under limits."""
+
+
+class Governor(object):
+    """Transport class to limit the requests to one TS-MPPT-60 sent through another transport.
+
+    * max_in_flight requests at most are sent at once.
+    * rate requests per second at most are sent, with burst of requests allowed at once.
+    * waiting requests are sent in first come first served order.
+    * the in-flight limit is halved when a request fails or takes longer
+      than target_latency, and grows back by 1 per limit successful requests.
+
+    The embedded web server of the controller tolerates only a few connections,
+    so share one Governor per host among all the objects talking to it.
+
+        transport = Governor.for_host("192.168.1.20", max_in_flight=2, rate=10.0)
+        status = SystemStatus("192.168.1.20", max_workers=4, transport=transport)
+    """
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        transport=None,
+        max_in_flight=2,
+        min_in_flight=1,
+        rate=None,
+        burst=1,
+        target_latency=2.0,
+        decrease=0.5,
+    ):
+        """Initialize Governor class object.
+
+        Keyword arguments:
+        transport -- transport object to send the requests, HttpTransport if None
+        max_in_flight -- maximum number of concurrent requests
+        min_in_flight -- lower bound of the adapted number of concurrent requests
+        rate -- maximum requests per second, not limited if None
+        burst -- number of requests sent at once without waiting for the rate
+        target_latency -- seconds of request taken as overload if exceeded
+        decrease -- factor to multiply the limit with on overload
+        """
+        if not 1 <= min_in_flight <= max_in_flight:
+            raise ValueError("1 <= min_in_flight <= max_in_flight must be satisfied")
+
+        self._transport = HttpTransport() if transport is None else transport
+        self._max_in_flight = max_in_flight
+        self._min_in_flight = min_in_flight
+        self._rate = rate
+        self._burst = burst
+        self._target_latency = target_latency
+        self._decrease = decrease
+
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        self._in_flight = 0
+        self._limit = float(max_in_flight)
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+
+        self._latency = None
+        self._requests = 0
+        self._errors = 0
+
+    @classmethod
+    def for_host(cls, host, **kwargs):
+        """Return the Governor shared in this process for the host, created with kwargs on first call.
+
+        Keyword arguments:
+        host -- TS-MPPT-60 host address like "192.168.1.20"
+        kwargs -- keyword arguments given to Governor on creation
+        """
+        with cls._registry_lock:
+            governor = cls._registry.get(host)
+            if governor is None:
+                governor = cls._registry[host] = cls(**kwargs)
+
+        return governor
+
+    @property
+    def limit(self):
+        """Current number of concurrent requests allowed."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        """Number of requests being sent."""
+        return self._in_flight
+
+    @property
+    def latency(self):
+        """Moving average of request latency in seconds, None before the first request."""
+        return self._latency
+
+    @property
+    def error_rate(self):
+        """Ratio of failed requests."""
+        return self._errors / self._requests if self._requests else 0.0
+
+    def _take_token(self):
+        """Take a token and return 0, or return seconds to wait for the next token."""
+        if self._rate is None:
+            return 0.0
+
+        now = time.monotonic()
+        self._tokens = min(float(self._burst), self._tokens + (now - self._refilled) * self._rate)
+        self._refilled = now
+
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+
+        return (1.0 - self._tokens) / self._rate
+
+    def _acquire(self):
+        ticket = object()
+
+        with self._cond:
+            self._queue.append(ticket)
+
+            try:
+                while True:
+                    if self._queue[0] is ticket and self._in_flight < int(self._limit):
+                        wait = self._take_token()
+                        if not wait:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+            self._in_flight += 1
+
+    def _release(self, latency, is_error):
+        with self._cond:
+            self._in_flight -= 1
+            self._requests += 1
+            self._latency = latency if self._latency is None else self._latency * 0.8 + latency * 0.2
+
+            if is_error:
+                self._errors += 1
+
+            if is_error or latency > self._target_latency:
+                self._limit = max(float(self._min_in_flight), self._limit * self._decrease)
+            else:
+                self._limit = min(float(self._max_in_flight), self._limit + 1.0 / self._limit)
+
+            self._cond.notify_all()
+
+    def get(self, url, timeout=(5, 15)):
+        """Wait for the turn, send GET request with the inner transport and return the response body.
+
+        Keyword arguments:
+        url -- URL including the query string
+        timeout -- timeout given to the inner transport
+        """
+        self._acquire()
+        started = time.monotonic()
+
+        try:
+            text = self._transport.get(url, timeout=timeout)
+        except Exception:
+            self._release(time.monotonic() - started, True)
+            raise
+
+        self._release(time.monotonic() - started, False)
+
+        return text
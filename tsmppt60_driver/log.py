@@ -0,0 +1,146 @@
+from tsmppt60_driver.base import ModbusRegisterTable
+
+
+"""TS-MPPT-60 driver module to download the daily log kept by the controller."""
+
+
+class DailyLog(object):
+    """Class to read the daily log records stored on TS-MPPT-60. Use this like below.
+
+        log = DailyLog(ManagementBase("192.168.1.20"))
+
+        for record in log.get_records():
+            print(record)
+
+        {'Hourmeter': {'group': 'Log', 'unit': 'h', 'value': 2376},
+         'Battery Voltage Min': {'group': 'Log', 'unit': 'V', 'value': 24.1},
+         'Battery Voltage Max': {'group': 'Log', 'unit': 'V', 'value': 28.7},
+         ...}
+
+    Records are read with wide range requests, several records at once, and
+    yielded one by one. The log area is a ring of LOG_RECORD_COUNT records,
+    so the index wraps to the first record after the last one. The index of
+    the next record and the Hourmeter of the last record are kept, so a later
+    call of get_records() resumes where the previous one stopped and stops at
+    the records already read on the previous lap.
+    """
+
+    _GROUP = "Log"
+
+    _FIELDS = (
+        ModbusRegisterTable.LOG_HOURMETER,
+        ModbusRegisterTable.LOG_ALARM_DAILY,
+        ModbusRegisterTable.LOG_BATTERY_VOLTAGE_MIN,
+        ModbusRegisterTable.LOG_BATTERY_VOLTAGE_MAX,
+        ModbusRegisterTable.LOG_AH_CHARGE_DAILY,
+        ModbusRegisterTable.LOG_WH_CHARGE_DAILY,
+        ModbusRegisterTable.LOG_FLAGS_DAILY,
+        ModbusRegisterTable.LOG_OUTPUT_POWER_MAX,
+        ModbusRegisterTable.LOG_BATTERY_TEMP_MIN,
+        ModbusRegisterTable.LOG_BATTERY_TEMP_MAX,
+        ModbusRegisterTable.LOG_FAULT_DAILY,
+        ModbusRegisterTable.LOG_ARRAY_VOLTAGE_MAX,
+        ModbusRegisterTable.LOG_TIME_ABSORPTION,
+        ModbusRegisterTable.LOG_TIME_FLOAT,
+    )
+
+    # Hourmeter value of a record which has never been written.
+    _EMPTY_HOURMETERS = (0x000000, 0xFFFFFF)
+
+    def __init__(self, mb, chunk_records=4, next_index=0, last_hourmeter=None):
+        """Initialize DailyLog class object.
+
+        Keyword arguments:
+        mb -- instance of ManagementBase class
+        chunk_records -- number of records read by one request, capped by MAX_READ_REGISTERS
+        next_index -- index of the record to start reading from
+        last_hourmeter -- Hourmeter of the last record already read, records not newer than this are not yielded
+        """
+        if chunk_records < 1:
+            raise ValueError("chunk_records must be 1 or more")
+
+        self._mb = mb
+        self._chunk_records = min(
+            chunk_records, ModbusRegisterTable.MAX_READ_REGISTERS // ModbusRegisterTable.LOG_RECORD_REGISTERS
+        )
+        self._next_index = next_index % ModbusRegisterTable.LOG_RECORD_COUNT
+        self._last_hourmeter = last_hourmeter
+
+    @property
+    def next_index(self):
+        """Index of the record which will be read first by the next get_records() call."""
+        return self._next_index
+
+    @property
+    def last_hourmeter(self):
+        """Hourmeter of the last record yielded, or None if nothing has been read."""
+        return self._last_hourmeter
+
+    def decode_record(self, values):
+        """Decode and return one record from its short integers like SystemStatus.get() does.
+
+        Keyword arguments:
+        values -- list of 16bit values of one record
+
+        Returns:
+            dict object keyed by label, or None if the record is empty.
+        """
+        record = {}
+
+        for offset, scale_factor, label, register in self._FIELDS:
+            raw_value = self._mb.decode_raw_value(values[offset : offset + register], register)
+
+            if label == ModbusRegisterTable.LOG_HOURMETER[2]:
+                raw_value &= 0xFFFFFF
+                if raw_value in self._EMPTY_HOURMETERS:
+                    return None
+
+            record[label] = {
+                "group": self._GROUP,
+                "unit": scale_factor,
+                "value": self._mb.scale_raw_value(raw_value, scale_factor),
+            }
+
+        return record
+
+    def get_records(self, start=None, count=ModbusRegisterTable.LOG_RECORD_COUNT):
+        """Generate decoded daily records from the controller.
+
+        Reading stops at the first empty record, at the first record whose
+        Hourmeter is not newer than last_hourmeter, or after count records.
+        The index wraps at the end of the log area. next_index and
+        last_hourmeter are advanced as each record is yielded.
+
+        Keyword arguments:
+        start -- index of the first record to read again from, next_index is used if None
+        count -- maximum number of records to read
+        """
+        total = ModbusRegisterTable.LOG_RECORD_COUNT
+
+        if start is not None:
+            self._next_index = start % total
+            self._last_hourmeter = None
+
+        size = ModbusRegisterTable.LOG_RECORD_REGISTERS
+        label = ModbusRegisterTable.LOG_HOURMETER[2]
+        count = min(count, total)
+
+        while count > 0:
+            # A request doesn't cross the end of the log area.
+            records = min(self._chunk_records, count, total - self._next_index)
+            address = ModbusRegisterTable.LOG_START_ADDRESS + self._next_index * size
+            values = self._mb._read_modbus(address, records * size)
+
+            for i in range(records):
+                record = self.decode_record(values[i * size : (i + 1) * size])
+                if record is None:
+                    return
+
+                hourmeter = record[label]["value"]
+                if self._last_hourmeter is not None and hourmeter <= self._last_hourmeter:
+                    return
+
+                self._last_hourmeter = hourmeter
+                self._next_index = (self._next_index + 1) % total
+                count -= 1
+                yield record
@@ -0,0 +1,167 @@
+import time
+from datetime import date
+
+
+"""TS-MPPT-60 driver module to compute derived metrics from status snapshots."""
+
+
+class DerivedMetrics(object):
+    """Class to compute power, efficiency and energy incrementally from SystemStatus.get() results.
+
+    Every update() costs O(1) and returns the derived values like below, so the
+    history never needs to be read again.
+
+        {'Array Power': {'group': 'Derived', 'unit': 'W', 'value': 74.77},
+         'Array Energy': {'group': 'Derived', 'unit': 'Wh', 'value': 312.5},
+         'Daily Array Power Min': {'group': 'Derived', 'unit': 'W', 'value': 0.0},
+         'Daily Array Power Max': {'group': 'Derived', 'unit': 'W', 'value': 81.2},
+         'Counter Resets': {'group': 'Derived', 'unit': 'Numbers', 'value': 0},
+         ...}
+
+    Labels depending on "Output Power" are given only when it is in the status,
+    which means SystemStatus.get(False). Once "Output Power" has been given,
+    an interval is integrated into neither energy if any of the powers at its
+    ends is missing or stale, so Running Efficiency compares the same time.
+    """
+
+    _GROUP = "Derived"
+
+    def __init__(self):
+        """Initialize DerivedMetrics class object."""
+        self.reset()
+
+    def reset(self):
+        """Reset all integrated and daily values."""
+        self._last_time = None
+        self._last_array_power = None
+        self._last_output_power = None
+        self._has_output = False
+        self._array_energy = 0.0
+        self._output_energy = 0.0
+
+        self._day = None
+        self._daily_min = None
+        self._daily_max = None
+        self._daily_peak = None
+
+        self._last_counters = {}
+        self._counter_energy = 0.0
+        self._counter_resets = 0
+
+    def _label(self, unit, value):
+        return {"group": self._GROUP, "unit": unit, "value": value}
+
+    @staticmethod
+    def _value(status, label):
+        item = status.get(label)
+        return None if item is None or item.get("stale") else item["value"]
+
+    def _integrate(self, last_power, power, seconds):
+        """Return the energy in Wh between two samples with trapezoidal rule."""
+        if last_power is None or power is None or seconds <= 0:
+            return 0.0
+        return (last_power + power) / 2.0 * seconds / 3600.0
+
+    def _update_counters(self, status):
+        """Count counter resets of "Amp Hours" and "Kilowatt Hours" and accumulate the kWh counter over them."""
+        is_reset = False
+
+        for label in ("Amp Hours", "Kilowatt Hours"):
+            value = self._value(status, label)
+            if value is None:
+                continue
+
+            last = self._last_counters.get(label)
+            self._last_counters[label] = value
+
+            if last is None:
+                continue
+
+            if value < last:
+                is_reset = True
+                delta = value
+            else:
+                delta = value - last
+
+            if label == "Kilowatt Hours":
+                self._counter_energy += delta
+
+        if is_reset:
+            self._counter_resets += 1
+
+    def _update_daily(self, timestamp, array_power, output_power):
+        today = date.fromtimestamp(timestamp)
+
+        if today != self._day:
+            self._day = today
+            self._daily_min = None
+            self._daily_max = None
+            self._daily_peak = None
+
+        if array_power is not None:
+            self._daily_min = array_power if self._daily_min is None else min(self._daily_min, array_power)
+            self._daily_max = array_power if self._daily_max is None else max(self._daily_max, array_power)
+
+        if output_power is not None:
+            self._daily_peak = output_power if self._daily_peak is None else max(self._daily_peak, output_power)
+
+    def update(self, status, timestamp=None):
+        """Feed one SystemStatus.get() result and return the derived labels.
+
+        Keyword arguments:
+        status -- dict object returned by SystemStatus.get()
+        timestamp -- UNIX time the status was got at, current time if None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        array_voltage = self._value(status, "Array Voltage")
+        array_current = self._value(status, "Array Current")
+        output_power = self._value(status, "Output Power")
+
+        array_power = None
+        if array_voltage is not None and array_current is not None:
+            array_power = array_voltage * array_current
+
+        if output_power is not None:
+            self._has_output = True
+
+        if self._last_time is not None:
+            seconds = timestamp - self._last_time
+            powers = [self._last_array_power, array_power]
+            if self._has_output:
+                powers += [self._last_output_power, output_power]
+
+            if None not in powers:
+                self._array_energy += self._integrate(self._last_array_power, array_power, seconds)
+                self._output_energy += self._integrate(self._last_output_power, output_power, seconds)
+
+        self._last_time = timestamp
+        self._last_array_power = array_power
+        self._last_output_power = output_power
+
+        self._update_daily(timestamp, array_power, output_power)
+        self._update_counters(status)
+
+        derived = {}
+
+        if array_power is not None:
+            derived["Array Power"] = self._label("W", round(array_power, 2))
+            derived["Array Energy"] = self._label("Wh", round(self._array_energy, 2))
+            derived["Daily Array Power Min"] = self._label("W", round(self._daily_min, 2))
+            derived["Daily Array Power Max"] = self._label("W", round(self._daily_max, 2))
+
+        if output_power is not None:
+            derived["Output Energy"] = self._label("Wh", round(self._output_energy, 2))
+            derived["Daily Output Power Peak"] = self._label("W", round(self._daily_peak, 2))
+
+            if array_power:
+                derived["Conversion Efficiency"] = self._label("%", round(output_power / array_power * 100.0, 2))
+            if self._array_energy > 0:
+                efficiency = self._output_energy / self._array_energy * 100.0
+                derived["Running Efficiency"] = self._label("%", round(efficiency, 2))
+
+        derived["Counter Energy"] = self._label("kWh", round(self._counter_energy, 2))
+        derived["Counter Resets"] = self._label("Numbers", self._counter_resets)
+
+        return derived
@@ -0,0 +1,287 @@
+"""TS-MPPT-60 driver's protocol modules without any I/O.
+
+This module turns register params into MBCSV.cgi request query strings and
+response bodies into scaled values. It does not send anything, so the same
+code is driven by ManagementBase with blocking requests, by an event loop,
+or by a process pool decoding recorded responses.
+"""
+
+
+DEFAULT_UNIT_ID = 0x01
+DEFAULT_FIELD = 4
+
+
+class ModbusRegisterTable(object):
+    """MODBUS register settings table."""
+
+    VOLTAGE_SCALING_HIGH = (0x0000, "", "Voltage Scaling High", 1)
+    VOLTAGE_SCALING_LOW = (0x0001, "", "Voltage Scaling Low", 1)
+    CURRENT_SCALING_HIGH = (0x0002, "", "Current Scaling High", 1)
+    CURRENT_SCALING_LOW = (0x0003, "", "Current Scaling Low", 1)
+    VOLTAGE_SCALING = (0x0000, "", "Voltage Scaling", 2)
+    CURRENT_SCALING = (0x0002, "", "Current Scaling", 2)
+    SOFTWARE_VERSION = (0x0004, "Numbers", "Software Version", 1)
+
+    BATTERY_VOLTAGE = (0x0026, "V", "Battery Voltage", 1)
+    CHARGING_CURRENT = (0x0027, "A", "Charge Current", 1)
+    TARGET_REGULATION_VOLTAGE = (0x0033, "V", "Target Voltage", 1)
+    OUTPUT_POWER = (0x003A, "W", "Output Power", 1)
+    ARRAY_VOLTAGE = (0x001B, "V", "Array Voltage", 1)
+    ARRAY_CURRENT = (0x001D, "A", "Array Current", 1)
+    VMP_LAST_SWEEP = (0x003D, "V", "Sweep Vmp", 1)
+    VOC_LAST_SWEEP = (0x003E, "V", "Sweep Voc", 1)
+    POWER_LAST_SWEEP = (0x003C, "W", "Sweep Pmax", 1)
+    HEATSINK_TEMP = (0x0023, "C", "Heat Sink Temperature", 1)
+    BATTERY_TEMP = (0x0025, "C", "Battery Temperature", 1)
+    AH_CHARGE_RESETABLE = (0x0034, "Ah", "Amp Hours", 2)
+    KWH_CHARGE_RESETABLE = (0x0038, "kWh", "Kilowatt Hours", 1)
+
+    LED_STATE = (0x0031, "Numbers", "LED State", 1)
+    CHARGE_STATE = (0x0032, "Numbers", "Charge State", 1)
+
+    # Maximum number of registers read by one request as MODBUS allows.
+    MAX_READ_REGISTERS = 125
+
+    # Daily log records kept by the controller itself. Each record is
+    # LOG_RECORD_REGISTERS wide and the fields below are offsets inside one record.
+    # The log area is a ring, the controller wraps to the first record after the last one.
+    LOG_START_ADDRESS = 0x8000
+    LOG_RECORD_REGISTERS = 16
+    LOG_RECORD_COUNT = 256
+
+    LOG_HOURMETER = (0x0000, "h", "Hourmeter", 2)
+    LOG_ALARM_DAILY = (0x0002, "Numbers", "Alarm Daily", 2)
+    LOG_BATTERY_VOLTAGE_MIN = (0x0004, "V", "Battery Voltage Min", 1)
+    LOG_BATTERY_VOLTAGE_MAX = (0x0005, "V", "Battery Voltage Max", 1)
+    LOG_AH_CHARGE_DAILY = (0x0006, "Ah", "Amp Hours Daily", 1)
+    LOG_WH_CHARGE_DAILY = (0x0007, "Wh", "Watt Hours Daily", 1)
+    LOG_FLAGS_DAILY = (0x0008, "Numbers", "Flags Daily", 1)
+    LOG_OUTPUT_POWER_MAX = (0x0009, "W", "Output Power Max", 1)
+    LOG_BATTERY_TEMP_MIN = (0x000A, "C", "Battery Temperature Min", 1)
+    LOG_BATTERY_TEMP_MAX = (0x000B, "C", "Battery Temperature Max", 1)
+    LOG_FAULT_DAILY = (0x000C, "Numbers", "Fault Daily", 1)
+    LOG_ARRAY_VOLTAGE_MAX = (0x000D, "V", "Array Voltage Max", 1)
+    LOG_TIME_ABSORPTION = (0x000E, "s", "Absorption Time", 1)
+    LOG_TIME_FLOAT = (0x000F, "s", "Float Time", 1)
+
+
+def encode_request(address, register, unit_id=DEFAULT_UNIT_ID, field=DEFAULT_FIELD):
+    """Return the query string of MBCSV.cgi request against MBID, Address, Register, and Field.
+
+    Keyword arguments:
+    address -- Address to get information
+    register -- Register to get information
+    unit_id -- MBID
+    field -- Field to get information
+
+    >>> encode_request(0x0026, 1)
+    'ID=1&F=4&AHI=0&ALO=38&RHI=0&RLO=1'
+    >>> encode_request(0x8010, 64, unit_id=2)
+    'ID=2&F=4&AHI=128&ALO=16&RHI=0&RLO=64'
+    """
+    return "ID={}&F={}&AHI={}&ALO={}&RHI={}&RLO={}".format(
+        unit_id, field, address >> 8, address & 255, register >> 8, register & 255
+    )
+
+
+def decode_response(body):
+    """Return the list of short integers (ex. 16bit values) decoded from MBCSV.cgi response body.
+
+    Keyword arguments:
+    body -- response body string or bytes like "1,4,2,17,160"
+
+    >>> decode_response("1,4,2,17,160")
+    [4512]
+    >>> decode_response(b"1,4,4,0,2,231,134")
+    [2, 59270]
+    """
+    if isinstance(body, bytes):
+        body = body.decode("ascii")
+
+    raw_values = [int(v) for v in body.split(",")]
+    idx_max = raw_values[2]
+    raw_values = raw_values[3:]
+    idx = 0
+    ret = []
+
+    while idx < idx_max:
+        ret_short = raw_values[idx] << 8
+        idx += 1
+        ret_short += raw_values[idx]
+        idx += 1
+        ret.append(ret_short)
+
+    return ret
+
+
+def decode_raw_value(values, register):
+    """Return a raw value decoded from the short integers read from TS-MPPT-60.
+
+    Keyword arguments:
+    values -- list of 16bit values like [0, 2]
+    register -- number of registers the value consists of
+
+    Returns:
+        Raw value as integer type.
+
+    >>> decode_raw_value([0xFFA8], 1)
+    -88
+    >>> decode_raw_value([0x0002, 0xE786], 2)
+    190342
+    """
+    if register > 1:
+        raw_value = (values[0] << 16) | (values[1] & 0xFFFF)
+    else:
+        raw_value = values[0]
+        raw_value &= 0xFFFF
+        if raw_value & 0x8000:
+            raw_value ^= 0xFFFF
+            raw_value = -1 * (raw_value + 1)
+
+    return raw_value
+
+
+def compute_scaler(values):
+    """Compute and return the voltage/current scaler as written on data sheet page 8 or 25.
+
+    Vscaling = whole.fraction = [V_PU hi].[V_PU lo]
+
+    Example:
+    Address:Value(hex):Variable Name
+    V_PU HI byte:0x004E = 78
+    V_PU LO byte:0x03A6 = 934
+
+    V_PU lo must be shifted by 16 (divided by 2^16)
+    and then added to V_PU hi Vscaling = 78 + 934/65536 = 78.01425
+
+    Keyword arguments:
+    values -- list of 16bit values of hi and lo
+
+    >>> round(compute_scaler([78, 934]), 5)
+    78.01425
+    """
+    return float(values[0]) + (float(values[1]) / pow(2, 16))
+
+
+def scale_raw_value(raw_value, scale_factor, vscale, iscale):
+    """Calculate and return a scaled value from a raw value.
+
+    Keyword arguments:
+    raw_value -- raw value returned by decode_raw_value()
+    scale_factor -- unit string
+    vscale -- voltage scaler
+    iscale -- current scaler
+
+    Returns:
+        Scaled value like 12.4 against your expecting.
+
+    >>> scale_raw_value(4512, "V", 180.0, 80.0)
+    24.79
+    >>> scale_raw_value(2550, "Ah", 180.0, 80.0)
+    255.0
+    """
+    if scale_factor == "V":
+        scaled_value = raw_value * vscale / pow(2, 15)
+    elif scale_factor == "A":
+        scaled_value = raw_value * iscale / pow(2, 15)
+    elif scale_factor == "W":
+        wscale = iscale * vscale
+        scaled_value = raw_value * wscale / pow(2, 17)
+    elif scale_factor == "Ah":
+        scaled_value = raw_value / 10.0
+    else:
+        scaled_value = raw_value
+
+    return round(scaled_value, 2)
+
+
+class Protocol(object):
+    """Class to encode requests and decode responses of one unit with its scalers, without any I/O.
+
+    Any transport or concurrency model drives this like below.
+
+        protocol = Protocol(unit_id=1)
+
+        for param, query in protocol.scaler_requests():
+            protocol.set_scaler(param, transport.get(url + "?" + query))
+
+        param = ModbusRegisterTable.BATTERY_VOLTAGE
+        body = transport.get(url + "?" + protocol.request(param))
+        protocol.decode(param, body)
+        24.79
+
+    Keyword arguments:
+    unit_id -- MODBUS ID of the unit
+    vscale -- voltage scaler if already known
+    iscale -- current scaler if already known
+    """
+
+    SCALERS = (ModbusRegisterTable.VOLTAGE_SCALING, ModbusRegisterTable.CURRENT_SCALING)
+
+    def __init__(self, unit_id=DEFAULT_UNIT_ID, vscale=None, iscale=None):
+        """Initialize Protocol class object.
+
+        Keyword arguments:
+        unit_id -- MODBUS ID of the unit
+        vscale -- voltage scaler if already known
+        iscale -- current scaler if already known
+        """
+        self.unit_id = unit_id
+        self.vscale = vscale
+        self.iscale = iscale
+
+    def request(self, param):
+        """Return the query string to get the param like ModbusRegisterTable.BATTERY_VOLTAGE.
+
+        Keyword arguments:
+        param -- tuple of (address, scale_factor, label, register)
+        """
+        return encode_request(param[0], param[3], self.unit_id)
+
+    def scaler_requests(self):
+        """Return the list of (param, query string) of the scalers not known yet."""
+        known = {ModbusRegisterTable.VOLTAGE_SCALING: self.vscale, ModbusRegisterTable.CURRENT_SCALING: self.iscale}
+        return [(param, self.request(param)) for param in self.SCALERS if known[param] is None]
+
+    def set_scaler(self, param, body):
+        """Compute the scaler from the response body of the scaler request and keep it.
+
+        Keyword arguments:
+        param -- ModbusRegisterTable.VOLTAGE_SCALING or ModbusRegisterTable.CURRENT_SCALING
+        body -- response body of the request
+        """
+        if param not in self.SCALERS:
+            raise ValueError("{} is not a scaler".format(param[2]))
+
+        scaler = compute_scaler(decode_response(body))
+
+        if param == ModbusRegisterTable.VOLTAGE_SCALING:
+            self.vscale = scaler
+        else:
+            self.iscale = scaler
+
+        return scaler
+
+    def scale(self, raw_value, scale_factor):
+        """Return the value scaled with the scalers of this unit.
+
+        Keyword arguments:
+        raw_value -- raw value returned by decode_raw_value()
+        scale_factor -- unit string
+        """
+        return scale_raw_value(raw_value, scale_factor, self.vscale, self.iscale)
+
+    def decode(self, param, body):
+        """Return the scaled value decoded from the response body of the param's request.
+
+        Keyword arguments:
+        param -- tuple of (address, scale_factor, label, register)
+        body -- response body string or bytes like "1,4,2,17,160"
+        """
+        return self.scale(decode_raw_value(decode_response(body), param[3]), param[1])
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod(verbose=True)
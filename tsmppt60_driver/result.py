@@ -0,0 +1,186 @@
+import sys
+import threading
+
+
+"""TS-MPPT-60 driver's typed result modules."""
+
+
+class Reading(object):
+    """Class of one status value like "Battery Voltage" with its group and unit.
+
+    The group and unit strings are interned, so all readings share them.
+
+    Keyword arguments:
+    label -- label string like "Battery Voltage"
+    group -- group string like "Battery"
+    unit -- unit string like "V"
+    value -- scaled value
+    """
+
+    __slots__ = ("label", "group", "unit", "value")
+
+    def __init__(self, label, group, unit, value):
+        """Initialize Reading class object.
+
+        Keyword arguments:
+        label -- label string like "Battery Voltage"
+        group -- group string like "Battery"
+        unit -- unit string like "V"
+        value -- scaled value
+        """
+        self.label = sys.intern(label)
+        self.group = sys.intern(group)
+        self.unit = sys.intern(unit)
+        self.value = value
+
+    def __repr__(self):
+        return "Reading({!r}, {!r}, {!r}, {!r})".format(self.label, self.group, self.unit, self.value)
+
+    def __eq__(self, other):
+        if not isinstance(other, Reading):
+            return NotImplemented
+        return (self.label, self.group, self.unit, self.value) == (other.label, other.group, other.unit, other.value)
+
+    def to_dict(self):
+        """Return the legacy dict object like {"group": "Battery", "unit": "V", "value": 12.1}."""
+        return {"group": self.group, "unit": self.unit, "value": self.value}
+
+
+class Layout(object):
+    """Class of the labels, groups and units shared by all snapshots got with the same params.
+
+    Use Layout.of() to get the shared object instead of creating new one.
+
+    Keyword arguments:
+    fields -- sequence of (label, group, unit) tuples
+    """
+
+    __slots__ = ("labels", "groups", "units", "index")
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, fields):
+        """Initialize Layout class object.
+
+        Keyword arguments:
+        fields -- sequence of (label, group, unit) tuples
+        """
+        self.labels = tuple(sys.intern(f[0]) for f in fields)
+        self.groups = tuple(sys.intern(f[1]) for f in fields)
+        self.units = tuple(sys.intern(f[2]) for f in fields)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def of(cls, fields):
+        """Return the shared Layout object against the fields.
+
+        Keyword arguments:
+        fields -- sequence of (label, group, unit) tuples
+        """
+        key = tuple(tuple(f) for f in fields)
+
+        with cls._cache_lock:
+            layout = cls._cache.get(key)
+            if layout is None:
+                layout = cls._cache[key] = cls(key)
+
+        return layout
+
+
+class Snapshot(object):
+    """Class of all status values got at once, returned by SystemStatus.get_snapshot().
+
+    Values are kept in a flat list ordered by the shared layout, and a value
+    is looked up by label in O(1).
+
+        snapshot = SystemStatus("192.168.1.20").get_snapshot()
+        snapshot.value("Battery Voltage")
+        24.79
+        snapshot["Battery Voltage"]
+        Reading('Battery Voltage', 'Battery', 'V', 24.79)
+        snapshot.to_dict()
+        {'Battery Voltage': {'group': 'Battery', 'unit': 'V', 'value': 24.79}, ...}
+
+    Keyword arguments:
+    layout -- Layout object of the values
+    values -- list of values ordered by the layout
+    timestamp -- UNIX time the values were got at
+    stale -- dict object of labels failed to get like {"Battery Voltage": {"age": 5.0, "error": "..."}}
+    """
+
+    __slots__ = ("layout", "values", "timestamp", "stale")
+
+    def __init__(self, layout, values, timestamp=None, stale=None):
+        """Initialize Snapshot class object.
+
+        Keyword arguments:
+        layout -- Layout object of the values
+        values -- list of values ordered by the layout
+        timestamp -- UNIX time the values were got at
+        stale -- dict object of labels failed to get, their values are the last good ones
+        """
+        if len(layout) != len(values):
+            raise ValueError("number of values does not match the layout")
+
+        self.layout = layout
+        self.values = values
+        self.timestamp = timestamp
+        self.stale = stale
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.layout.labels)
+
+    def __contains__(self, label):
+        return label in self.layout.index
+
+    def __getitem__(self, label):
+        i = self.layout.index[label]
+        return Reading(label, self.layout.groups[i], self.layout.units[i], self.values[i])
+
+    def value(self, label, default=None):
+        """Return the value of the label, or default if the label is not in this snapshot.
+
+        Keyword arguments:
+        label -- label string like "Battery Voltage"
+        default -- value returned if the label is not found
+        """
+        i = self.layout.index.get(label)
+        return default if i is None else self.values[i]
+
+    def readings(self):
+        """Return the list of Reading objects of all values."""
+        layout = self.layout
+        return [Reading(*r) for r in zip(layout.labels, layout.groups, layout.units, self.values)]
+
+    def is_stale(self, label):
+        """Return True if the value of the label is the last good one because getting it failed.
+
+        Keyword arguments:
+        label -- label string like "Battery Voltage"
+        """
+        return bool(self.stale) and label in self.stale
+
+    def to_dict(self):
+        """Return the legacy dict object same as SystemStatus.get() returns.
+
+        Stale labels have "stale", "age" and "error" keys in addition.
+        """
+        layout = self.layout
+        status = {
+            label: {"group": group, "unit": unit, "value": value}
+            for label, group, unit, value in zip(layout.labels, layout.groups, layout.units, self.values)
+        }
+
+        if self.stale:
+            for label, info in self.stale.items():
+                status[label]["stale"] = True
+                status[label].update(info)
+
+        return status
@@ -0,0 +1,219 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tsmppt60_driver import SystemStatus
+
+
+"""TS-MPPT-60 driver module to serve the latest status of controllers over HTTP."""
+
+
+class _Document(object):
+    """Encoded JSON body with its gzip compressed body and ETag, built once per poll."""
+
+    __slots__ = ("body", "gzip_body", "etag")
+
+    def __init__(self, obj):
+        self.body = json.dumps(obj, sort_keys=True).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body)
+        self.etag = '"{}"'.format(hashlib.sha1(self.body).hexdigest()[:20])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler to send the documents built by StatusServer."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, so don't let them wait for delayed ACK on keep-alive connections.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        document = self.server.status_server.get_document(self.path.split("?")[0])
+        self.server.status_server.count_request()
+
+        if document is None:
+            self.send_error(404)
+            return
+
+        if document.etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", document.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = document.body
+        is_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        if is_gzip:
+            body = document.gzip_body
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", document.etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if is_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        self.server.status_server._logger.debug(format, *args)
+
+
+class StatusServer(object):
+    """Class to poll controllers with SystemStatus on a schedule and serve the latest status as JSON.
+
+    The load on the controllers stays the same however many clients read
+    the status. The following paths are served.
+
+        /          -- {"192.168.1.20": {document of the host}, ...}
+        /<host>    -- document of the host like below
+
+        {"timestamp": 1700000000.0, "status": {SystemStatus.get() result}}
+
+    timestamp is UNIX time of the last successful poll. If the last poll
+    failed, the document keeps the last good status and has "error" with
+    the error, UNIX time of the failure and the age of the status then.
+    status and timestamp are None if the host has never answered.
+
+        {"timestamp": 1700000000.0, "status": {...},
+         "error": {"message": "ConnectionError(...)", "timestamp": 1700000060.0, "age": 60.0}}
+
+    The JSON body, its gzip compressed body and ETag are built once per
+    poll, so a request only sends the prepared bytes. Use this like below,
+    or run "python -m tsmppt60_driver serve 192.168.1.20".
+
+        server = StatusServer(["192.168.1.20"], port=8080)
+        server.serve_forever()
+    """
+
+    def __init__(self, hosts, interval=1.0, is_limit=False, bind="", port=8080, system_status_factory=SystemStatus):
+        """Initialize StatusServer class object.
+
+        Keyword arguments:
+        hosts -- list of TS-MPPT-60 host addresses like ["192.168.1.20"]
+        interval -- seconds between the polls of each host
+        is_limit -- limit the number of getting status
+        bind -- address to bind the server to
+        port -- port number to listen, a free port is used if 0
+        system_status_factory -- callable to create SystemStatus like object from host
+        """
+        self._logger = logging.getLogger(type(self).__name__)
+        self._hosts = list(hosts)
+        self._interval = interval
+        self._is_limit = is_limit
+        self._factory = system_status_factory
+
+        self._system_status = {}
+        self._status = {}
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._pollers = []
+        self._is_serving = False
+        self._requests = 0
+
+        self._httpd = ThreadingHTTPServer((bind, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.status_server = self
+
+    @property
+    def port(self):
+        """Port number the server listens on."""
+        return self._httpd.server_address[1]
+
+    @property
+    def requests_served(self):
+        """Number of requests handled, to benchmark requests per second."""
+        return self._requests
+
+    def count_request(self):
+        """Count one handled request."""
+        with self._lock:
+            self._requests += 1
+
+    def get_document(self, path):
+        """Return the prepared document against the path, or None if not found."""
+        return self._documents.get(path)
+
+    def poll(self, host):
+        """Poll the host once and rebuild the documents. An error is kept in the document of the host and raised.
+
+        Keyword arguments:
+        host -- TS-MPPT-60 host address
+        """
+        system_status = self._system_status.get(host)
+
+        try:
+            if system_status is None:
+                system_status = self._system_status[host] = self._factory(host)
+            status = system_status.get(self._is_limit)
+        except Exception as e:
+            now = time.time()
+            last = self._status.get(host) or {"timestamp": None, "status": None}
+            age = None if last["timestamp"] is None else now - last["timestamp"]
+            self._update(host, dict(last, error={"message": repr(e), "timestamp": now, "age": age}))
+            raise
+
+        self._update(host, {"timestamp": time.time(), "status": status})
+
+    def _update(self, host, document):
+        with self._lock:
+            self._status[host] = document
+            documents = dict(self._documents)
+            documents["/" + host] = _Document(document)
+            documents["/"] = _Document(self._status)
+            self._documents = documents
+
+    def _run_poller(self, host):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+
+            try:
+                self.poll(host)
+            except Exception:
+                self._logger.exception("failed to poll %s", host)
+
+            self._stop_event.wait(max(0.0, self._interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Start polling the hosts and serving on background threads."""
+        for host in self._hosts:
+            thread = threading.Thread(target=self._run_poller, args=(host,), daemon=True)
+            thread.start()
+            self._pollers.append(thread)
+
+        thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        thread.start()
+        self._pollers.append(thread)
+        self._is_serving = True
+
+    def serve_forever(self):
+        """Start polling the hosts and serve until KeyboardInterrupt."""
+        self.start()
+
+        try:
+            while not self._stop_event.wait(3600):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop polling and serving."""
+        self._stop_event.set()
+
+        if self._is_serving:
+            self._httpd.shutdown()
+            self._is_serving = False
+        self._httpd.server_close()
+
+        for thread in self._pollers:
+            if thread is not threading.current_thread():
+                thread.join()
+        self._pollers = []
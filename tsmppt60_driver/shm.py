@@ -0,0 +1,286 @@
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from tsmppt60_driver.protocol import ModbusRegisterTable
+from tsmppt60_driver.result import Layout, Snapshot
+
+
+"""TS-MPPT-60 driver module to share the latest snapshot with local processes through shared memory."""
+
+
+# Names of the segments created by the publishers in this process.
+_published_names = set()
+
+
+# Groups and params of all status values in the order SystemStatus.get_snapshot(False) reads them.
+_FULL_PARAMS = (
+    (
+        "Battery",
+        (
+            ModbusRegisterTable.BATTERY_VOLTAGE,
+            ModbusRegisterTable.TARGET_REGULATION_VOLTAGE,
+            ModbusRegisterTable.CHARGING_CURRENT,
+            ModbusRegisterTable.OUTPUT_POWER,
+        ),
+    ),
+    (
+        "Array",
+        (
+            ModbusRegisterTable.ARRAY_VOLTAGE,
+            ModbusRegisterTable.ARRAY_CURRENT,
+            ModbusRegisterTable.VMP_LAST_SWEEP,
+            ModbusRegisterTable.VOC_LAST_SWEEP,
+            ModbusRegisterTable.POWER_LAST_SWEEP,
+        ),
+    ),
+    ("Temperature", (ModbusRegisterTable.HEATSINK_TEMP, ModbusRegisterTable.BATTERY_TEMP)),
+    ("Counter", (ModbusRegisterTable.AH_CHARGE_RESETABLE, ModbusRegisterTable.KWH_CHARGE_RESETABLE)),
+    ("Condition", (ModbusRegisterTable.LED_STATE, ModbusRegisterTable.CHARGE_STATE)),
+)
+
+_FULL_LAYOUT = Layout.of([(param[2], group, param[1]) for group, params in _FULL_PARAMS for param in params])
+
+
+def get_full_layout():
+    """Return the Layout of all status values of ModbusRegisterTable, same as SystemStatus.get_snapshot(False)."""
+    return _FULL_LAYOUT
+
+
+class _Segment(object):
+    """Fixed layout of the shared memory segment.
+
+    header: version counter (uint64), timestamp (double), number of values (uint32), padding
+    body: value (double) per label, then type (uint8) per label as 0: missing, 1: float, 2: int,
+    with the stale bit set if the value is the last good one
+    """
+
+    HEADER = struct.Struct("<QdI4x")
+
+    _MISSING = 0
+    _FLOAT = 1
+    _INT = 2
+    _STALE = 0x80
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.values = struct.Struct("<{}d{}B".format(len(layout), len(layout)))
+        self.size = self.HEADER.size + self.values.size
+
+    def pack(self, snapshot):
+        """Return the body packed from the snapshot, labels not in the snapshot or without value are marked as missing."""
+        values = [0.0] * len(self.layout)
+        types = [self._MISSING] * len(self.layout)
+        stale = snapshot.stale or ()
+
+        for label, value in zip(snapshot.layout.labels, snapshot.values):
+            i = self.layout.index.get(label)
+            if i is None or value is None:
+                continue
+            values[i] = float(value)
+            types[i] = self._INT if isinstance(value, int) else self._FLOAT
+            if label in stale:
+                types[i] |= self._STALE
+
+        return self.values.pack(*values, *types)
+
+    def unpack(self, body, timestamp):
+        """Return Snapshot unpacked from the body with the labels not missing.
+
+        Stale labels are marked in the snapshot without their age and error.
+        """
+        count = len(self.layout)
+        unpacked = self.values.unpack(body)
+        fields = []
+        values = []
+        stale = {}
+
+        for i, t in enumerate(unpacked[count:]):
+            if t == self._MISSING:
+                continue
+            label = self.layout.labels[i]
+            fields.append((label, self.layout.groups[i], self.layout.units[i]))
+            values.append(int(unpacked[i]) if t & ~self._STALE == self._INT else unpacked[i])
+            if t & self._STALE:
+                stale[label] = {}
+
+        return Snapshot(Layout.of(fields), values, timestamp, stale or None)
+
+
+class SnapshotPublisher(object):
+    """Class to poll TS-MPPT-60 and publish the latest snapshot into shared memory.
+
+    Only one process should poll the controller. The other processes read
+    the snapshot with SnapshotReader without any network access.
+
+        publisher = SnapshotPublisher(SystemStatus("192.168.1.20"), "tsmppt60")
+        publisher.run(interval=1.0)
+
+    The segment is written with a seqlock: the version counter is odd while
+    the values are being written, and readers retry until they copy the
+    values with the same even version before and after.
+    """
+
+    def __init__(self, system_status, name=None, is_limit=False):
+        """Initialize SnapshotPublisher class object.
+
+        Keyword arguments:
+        system_status -- SystemStatus object to poll
+        name -- name of the shared memory segment, random name if None
+        is_limit -- limit the number of getting status
+        """
+        self._system_status = system_status
+        self._is_limit = is_limit
+        self._segment = _Segment(get_full_layout())
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=self._segment.size)
+        self._version = 0
+        _published_names.add(self._shm.name)
+
+        _Segment.HEADER.pack_into(self._shm.buf, 0, self._version, 0.0, len(self._segment.layout))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def name(self):
+        """Name of the shared memory segment given to SnapshotReader."""
+        return self._shm.name
+
+    def publish(self, snapshot=None):
+        """Write the snapshot into shared memory and return it.
+
+        Keyword arguments:
+        snapshot -- Snapshot object to write, got from the controller if None
+        """
+        if snapshot is None:
+            snapshot = self._system_status.get_snapshot(self._is_limit)
+
+        body = self._segment.pack(snapshot)
+        header = _Segment.HEADER
+        buf = self._shm.buf
+        count = len(self._segment.layout)
+
+        header.pack_into(buf, 0, self._version + 1, 0.0, count)
+        buf[header.size : self._segment.size] = body
+        header.pack_into(buf, 0, self._version + 2, snapshot.timestamp or time.time(), count)
+        self._version += 2
+
+        return snapshot
+
+    def run(self, interval=1.0, stop_event=None):
+        """Publish the snapshot every interval seconds until the stop event is set.
+
+        Keyword arguments:
+        interval -- seconds between the polls
+        stop_event -- threading.Event or multiprocessing.Event object to stop, runs forever if None
+        """
+        while stop_event is None or not stop_event.is_set():
+            started = time.monotonic()
+            self.publish()
+            wait = max(0.0, interval - (time.monotonic() - started))
+
+            if stop_event is None:
+                time.sleep(wait)
+            else:
+                stop_event.wait(wait)
+
+    def close(self, unlink=True):
+        """Close the shared memory segment.
+
+        Keyword arguments:
+        unlink -- if True, the segment is removed
+        """
+        self._shm.close()
+
+        if unlink:
+            self._shm.unlink()
+            _published_names.discard(self._shm.name)
+
+
+class SnapshotReader(object):
+    """Class to read the latest snapshot published by SnapshotPublisher.
+
+        reader = SnapshotReader("tsmppt60")
+        print(reader.read().value("Battery Voltage"))
+
+    The segment is owned by the publisher, and closing or exiting the
+    reader process doesn't remove it.
+    """
+
+    # Seconds to sleep between retries, doubled from the first one up to the last one.
+    _BACKOFF_MIN = 0.00001
+    _BACKOFF_MAX = 0.001
+
+    def __init__(self, name, timeout=1.0):
+        """Initialize SnapshotReader class object.
+
+        Keyword arguments:
+        name -- name of the shared memory segment
+        timeout -- seconds to keep retrying while the publisher is writing
+        """
+        # The segment is owned by the publisher, so this process must not remove it on exit.
+        if sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if self._shm.name not in _published_names:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._timeout = timeout
+
+        self._segment = _Segment(get_full_layout())
+        _, _, count = _Segment.HEADER.unpack_from(self._shm.buf, 0)
+
+        if count != len(self._segment.layout):
+            self._shm.close()
+            raise ValueError("layout of shared memory {} does not match".format(name))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def version(self):
+        """Version counter of the published snapshot, 0 if nothing is published yet."""
+        return _Segment.HEADER.unpack_from(self._shm.buf, 0)[0]
+
+    def read(self):
+        """Return the latest consistent Snapshot object, or None if nothing is published yet.
+
+        While the publisher is writing, this yields the CPU and retries with
+        backoff, so a publisher descheduled in the middle of writing can
+        finish. RuntimeError is raised if no consistent copy is got in timeout.
+        """
+        header = _Segment.HEADER
+        buf = self._shm.buf
+        deadline = None
+        backoff = 0.0
+
+        while True:
+            version, timestamp, _ = header.unpack_from(buf, 0)
+
+            if not version & 1:
+                body = bytes(buf[header.size : self._segment.size])
+
+                if header.unpack_from(buf, 0)[0] == version:
+                    if version == 0:
+                        return None
+                    return self._segment.unpack(body, timestamp)
+
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + self._timeout
+            elif now >= deadline:
+                raise RuntimeError("failed to read consistent snapshot")
+
+            time.sleep(backoff)
+            backoff = min(self._BACKOFF_MAX, backoff * 2 or self._BACKOFF_MIN)
+
+    def close(self):
+        """Close the shared memory segment without removing it."""
+        self._shm.close()
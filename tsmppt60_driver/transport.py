@@ -0,0 +1,128 @@
+import collections
+import gzip
+import json
+import threading
+import time
+
+from tsmppt60_driver.base import HttpTransport
+
+
+"""TS-MPPT-60 driver's transport modules to record and replay requests to MBCSV.cgi."""
+
+
+def _open(path, mode):
+    """Open the path as text file, gzip compressed if it ends with ".gz"."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RecordingTransport(object):
+    """Class to record every request and response going through another transport into a file.
+
+    One JSON object per line is written like below. The file is gzip
+    compressed if the path ends with ".gz".
+
+        {"t": 0.0, "d": 0.0123, "u": "http://192.168.1.20/MBCSV.cgi?ID=1&...", "b": "1,4,2,0,0"}
+
+    t is the seconds since the first request and d is the seconds taken by
+    the request. Use this like below.
+
+        with RecordingTransport("session.jsonl.gz") as transport:
+            SystemStatus("192.168.1.20", transport=transport).get(False)
+    """
+
+    def __init__(self, path, transport=None):
+        """Initialize RecordingTransport class object.
+
+        Keyword arguments:
+        path -- file path to record to
+        transport -- transport object to send the requests, HttpTransport if None
+        """
+        self._transport = HttpTransport() if transport is None else transport
+        self._file = _open(path, "w")
+        self._lock = threading.Lock()
+        self._started = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, url, timeout=(5, 15)):
+        """Send GET request with the inner transport, record it and return the response body.
+
+        Keyword arguments:
+        url -- URL including the query string
+        timeout -- timeout given to the inner transport
+        """
+        started = time.monotonic()
+        text = self._transport.get(url, timeout=timeout)
+        duration = time.monotonic() - started
+
+        with self._lock:
+            if self._started is None:
+                self._started = started
+
+            record = {"t": round(started - self._started, 6), "d": round(duration, 6), "u": url, "b": text}
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+        return text
+
+    def close(self):
+        """Close the record file."""
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport(object):
+    """Class to play back requests recorded by RecordingTransport without TS-MPPT-60.
+
+    Responses are looked up by URL and given in the recorded order for each
+    URL. The recorded request duration is reproduced divided by speed, so
+    speed=1.0 is the original timing and speed=None means no wait.
+
+        transport = ReplayTransport("session.jsonl.gz", speed=None)
+        SystemStatus("192.168.1.20", transport=transport).get(False)
+    """
+
+    def __init__(self, path, speed=1.0, loop=True):
+        """Initialize ReplayTransport class object.
+
+        Keyword arguments:
+        path -- file path recorded by RecordingTransport
+        speed -- factor to divide the recorded duration with, no wait if None or 0
+        loop -- if True, responses of a URL are repeated after all were played back
+        """
+        self._speed = speed
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._records = collections.defaultdict(collections.deque)
+
+        with _open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records[record["u"]].append((record["d"], record["b"]))
+
+    def get(self, url, timeout=(5, 15)):
+        """Return the recorded response body against the URL.
+
+        Keyword arguments:
+        url -- URL including the query string
+        timeout -- not used, kept for the same interface as HttpTransport
+        """
+        with self._lock:
+            records = self._records.get(url)
+            if not records:
+                raise LookupError("no recorded response for " + url)
+
+            duration, text = records.popleft()
+            if self._loop:
+                records.append((duration, text))
+
+        if self._speed:
+            time.sleep(duration / self._speed)
+
+        return text